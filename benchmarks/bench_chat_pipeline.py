@@ -0,0 +1,104 @@
+import os
+import time
+import asyncio
+import argparse
+from typing import Dict, List, Any
+
+os.environ.setdefault("TRACING_ENABLED", "false")
+
+from bench_utils import REPO_ROOT, summarize, write_results, free_port, start_server, stop_servers
+from mock_upstreams import MockConfig, start_mock_upstreams
+
+from pydantic_ai import Agent
+from mcp_transports import MCP_TRANSPORTS, mcp_server_url, build_mcp_server
+from model_backends import build_replay_model, load_transcripts
+
+
+DEFAULT_TRANSCRIPTS = os.path.join(REPO_ROOT, "benchmarks", "transcripts", "sample.jsonl")
+SERVER_SCRIPTS = ["stock_mcp_server.py", "news_mcp_server.py"]
+
+
+def scripted_delay(transcript: Dict[str, Any], delay_scale: float) -> float:
+    return sum(float(turn.get("delay", 0)) for turn in transcript.get("turns", [])) * delay_scale
+
+
+async def run_session(model, urls: List[str], queries: List[Dict[str, Any]], delay_scale: float,
+                      latencies: List[float], overheads: List[float], errors: List[str], transport: str):
+    """One chat session issuing its queries in sequence, the way `process_query` does."""
+    servers = [build_mcp_server(url, script, transport) for url, script in zip(urls, SERVER_SCRIPTS)]
+    agent = Agent(model, mcp_servers=servers)
+    for transcript in queries:
+        start = time.perf_counter()
+        try:
+            async with agent.run_mcp_servers():
+                await agent.run(transcript["query"])
+        except Exception as e:
+            errors.append(str(e))
+            continue
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        overheads.append(max(elapsed - scripted_delay(transcript, delay_scale), 0.0))
+
+
+async def drive(model, urls: List[str], transcripts: List[Dict[str, Any]], sessions: int,
+                queries_per_session: int, delay_scale: float, transport: str) -> Dict[str, Any]:
+    latencies: List[float] = []
+    overheads: List[float] = []
+    errors: List[str] = []
+    tasks = []
+    for s in range(sessions):
+        queries = [transcripts[(s + i) % len(transcripts)] for i in range(queries_per_session)]
+        tasks.append(run_session(model, urls, queries, delay_scale, latencies, overheads, errors, transport))
+
+    start = time.perf_counter()
+    await asyncio.gather(*tasks)
+    wall_time = time.perf_counter() - start
+    return {
+        "wall_time_s": round(wall_time, 3),
+        "query_latency": summarize(latencies, wall_time, len(errors)),
+        # End-to-end latency minus the scripted model delays: MCP and frontend overhead alone
+        "overhead": summarize(overheads, wall_time),
+        "sample_errors": errors[:5],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the chat pipeline offline with the replay model")
+    parser.add_argument("--sessions", type=int, default=100, help="Concurrent chat sessions")
+    parser.add_argument("--queries", type=int, default=5, help="Queries per session")
+    parser.add_argument("--transcripts", default=DEFAULT_TRANSCRIPTS)
+    parser.add_argument("--delay-scale", type=float, default=0.0, help="Multiplier for scripted model delays")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock upstream latency")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--transport", choices=MCP_TRANSPORTS, default="sse")
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args()
+
+    transcripts = load_transcripts(args.transcripts)
+    model = build_replay_model(args.transcripts, args.delay_scale)
+
+    mock_server, env = start_mock_upstreams(config=MockConfig(args.latency_ms, args.latency_ms / 5, args.failure_rate, 42))
+    env["TRACING_ENABLED"] = "false"
+    stock_port, news_port = free_port(), free_port()
+    urls = [mcp_server_url("127.0.0.1", stock_port, args.transport), mcp_server_url("127.0.0.1", news_port, args.transport)]
+    processes = []
+    try:
+        if args.transport == "stdio":
+            # Each session spawns its own server subprocesses, which inherit the mock settings
+            os.environ.update(env)
+        else:
+            env["MCP_TRANSPORT"] = args.transport
+            processes.append(start_server("stock_mcp_server.py", "STOCK_MCP_SERVER_PORT", stock_port, env))
+            processes.append(start_server("news_mcp_server.py", "NEWS_MCP_SERVER_PORT", news_port, env))
+        results = asyncio.run(drive(model, urls, transcripts, args.sessions, args.queries, args.delay_scale, args.transport))
+    finally:
+        stop_servers(processes)
+        mock_server.shutdown()
+
+    print(f"Query latency: {results['query_latency']}")
+    print(f"Overhead: {results['overhead']}")
+    write_results("chat_pipeline", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
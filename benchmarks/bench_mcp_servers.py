@@ -0,0 +1,131 @@
+import os
+import time
+import asyncio
+import argparse
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Dict, List, Any
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.stdio import stdio_client
+
+from bench_utils import summarize, write_results, free_port, start_server, stop_servers
+from mock_upstreams import MockConfig, start_mock_upstreams
+
+
+SAMPLE_TEXT = (
+    "Model Context Protocol servers expose tools to language models. "
+    "Each tool call travels over a transport to the server and back.\n\n"
+    "This paragraph exists so the analyzer has more than one paragraph to count."
+)
+
+# Tool mix per server: (tool name, arguments)
+STOCK_CALLS = [
+    ("get_stock_data", {"symbol": "IBM"}),
+    ("validate_phone_number", {"phone": "9575787870", "country": "India"}),
+    ("validate_phone_numbers", {"phones": ["9575787870", "+91 95757 87870", "957578787", "8123456789"], "country": "India"}),
+]
+NEWS_CALLS = [
+    ("get_country_info_custom", {"country_name": "India"}),
+    ("get_news_by_region", {"country": "in"}),
+    ("analyze_text", {"text": SAMPLE_TEXT}),
+]
+
+
+@asynccontextmanager
+async def open_transport(target, transport: str = "sse"):
+    """Client streams for a server URL, or StdioServerParameters in stdio mode."""
+    if transport == "stdio":
+        async with stdio_client(target) as (read, write):
+            yield read, write
+    elif transport == "streamable-http":
+        from mcp.client.streamable_http import streamablehttp_client
+        async with streamablehttp_client(target) as (read, write, _):
+            yield read, write
+    else:
+        async with sse_client(target) as (read, write):
+            yield read, write
+
+
+async def run_session(target, calls: List[tuple], calls_per_session: int, latencies: Dict[str, List[float]],
+                      errors: Dict[str, int], transport: str = "sse"):
+    """One MCP client session issuing `calls_per_session` tool calls in sequence."""
+    async with open_transport(target, transport) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            for i in range(calls_per_session):
+                tool, arguments = calls[i % len(calls)]
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, arguments)
+                    failed = result.isError
+                except Exception:
+                    failed = True
+                latencies.setdefault(tool, []).append(time.perf_counter() - start)
+                if failed:
+                    errors[tool] = errors.get(tool, 0) + 1
+
+
+async def drive(session_targets: List[tuple], calls_per_session: int, transport: str = "sse") -> Dict[str, Any]:
+    """Run one concurrent session per (target, calls) pair and summarize per tool."""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    tasks = [run_session(target, calls, calls_per_session, latencies, errors, transport) for target, calls in session_targets]
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+    wall_time = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    results = {
+        "wall_time_s": round(wall_time, 3),
+        "failed_sessions": sum(1 for outcome in outcomes if isinstance(outcome, Exception)),
+        "overall": summarize(all_latencies, wall_time, sum(errors.values())),
+        "tools": {tool: summarize(values, wall_time, errors.get(tool, 0)) for tool, values in sorted(latencies.items())},
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark both MCP servers over SSE against local upstream mocks")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent client sessions per server")
+    parser.add_argument("--calls", type=int, default=20, help="Tool calls per session")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of upstream calls that return 503")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", choices=["sqlite", "none"], default="sqlite", help="Shared cache backend for the servers")
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args()
+
+    mock_config = MockConfig(args.latency_ms, args.jitter_ms, args.failure_rate, args.seed)
+    mock_server, env = start_mock_upstreams(config=mock_config)
+    env["TRACING_ENABLED"] = "false"
+    env["CACHE_BACKEND"] = args.cache
+    # Start from an empty cache so runs are comparable
+    cache_dir = tempfile.TemporaryDirectory()
+    env["CACHE_DB_PATH"] = os.path.join(cache_dir.name, "cache.sqlite3")
+
+    stock_port, news_port = free_port(), free_port()
+    processes = []
+    try:
+        processes.append(start_server("stock_mcp_server.py", "STOCK_MCP_SERVER_PORT", stock_port, env))
+        processes.append(start_server("news_mcp_server.py", "NEWS_MCP_SERVER_PORT", news_port, env))
+        targets = [
+            (f"http://127.0.0.1:{stock_port}/sse", STOCK_CALLS),
+            (f"http://127.0.0.1:{news_port}/sse", NEWS_CALLS),
+        ]
+        results = asyncio.run(drive(targets * args.sessions, args.calls))
+        results["upstream_requests"] = dict(mock_config.request_counts)
+    finally:
+        stop_servers(processes)
+        mock_server.shutdown()
+        cache_dir.cleanup()
+
+    print(f"Overall: {results['overall']}")
+    write_results("mcp_servers", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import time
+import inspect
+import argparse
+from typing import Callable, Dict, Any
+
+os.environ.setdefault("TRACING_ENABLED", "false")
+
+from bench_utils import summarize, write_results
+
+import news_mcp_server
+
+
+SHORT_TEXT = "The quick brown fox jumps over the lazy dog. " * 5
+LONG_TEXT = ("Model Context Protocol servers expose tools to language models. " * 40 + "\n\n") * 25
+
+REPORT_CONTENT = {
+    "Summary": "Quarterly performance summary. " * 10,
+    "Metrics": [f"Metric {i}: {i * 3}%" for i in range(50)],
+    "Details": {f"Key {i}": f"Value {i}" for i in range(50)},
+}
+
+
+def bench(func: Callable, iterations: int, *args, **kwargs) -> Dict[str, Any]:
+    """Time `iterations` sequential calls of `func`."""
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call_start = time.perf_counter()
+        func(*args, **kwargs)
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def unwrap(func: Callable) -> Callable:
+    """Benchmark the tool body itself, without the tracing or response-budget wrappers."""
+    return inspect.unwrap(func)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the news MCP server helpers")
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args()
+
+    results = {}
+    analyze_text = unwrap(news_mcp_server.analyze_text)
+    results["analyze_text_short"] = bench(analyze_text, args.iterations, SHORT_TEXT)
+    results["analyze_text_long"] = bench(analyze_text, args.iterations, LONG_TEXT)
+
+    # tiktoken fetches its encoding files on first use, so this needs network or a warm TIKTOKEN_CACHE_DIR
+    calculate_token_length = unwrap(news_mcp_server.calculate_token_length)
+    try:
+        calculate_token_length("warm up")
+        results["calculate_token_length_short"] = bench(calculate_token_length, args.iterations, SHORT_TEXT)
+        results["calculate_token_length_long"] = bench(calculate_token_length, args.iterations, LONG_TEXT)
+    except Exception as e:
+        results["calculate_token_length"] = {"skipped": f"tiktoken encoding unavailable: {e}"}
+
+    for format in ["markdown", "html", "txt", "json"]:
+        results[f"format_report_{format}"] = bench(
+            news_mcp_server._format_report_content, args.iterations, "Benchmark Report", REPORT_CONTENT, format
+        )
+
+    for name, summary in results.items():
+        print(f"{name}: {summary}")
+    write_results("micro", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import asyncio
+import argparse
+import tempfile
+import os
+
+from bench_utils import write_results, free_port, start_server, stop_servers
+from bench_mcp_servers import STOCK_CALLS, NEWS_CALLS, drive
+from mock_upstreams import MockConfig, start_mock_upstreams
+
+
+def run_with_replicas(replicas: int, sessions: int, calls: int, mock_env: dict, cache_dir: str) -> dict:
+    """
+    Start `replicas` copies of each MCP server sharing one cache file and
+    spread the sessions across them, pinning each session to one replica
+    the way the proxy does.
+    """
+    env = dict(mock_env)
+    env["TRACING_ENABLED"] = "false"
+    env["CACHE_DB_PATH"] = os.path.join(cache_dir, f"cache_{replicas}.sqlite3")
+
+    processes = []
+    stock_urls, news_urls = [], []
+    try:
+        for _ in range(replicas):
+            stock_port, news_port = free_port(), free_port()
+            processes.append(start_server("stock_mcp_server.py", "STOCK_MCP_SERVER_PORT", stock_port, env))
+            processes.append(start_server("news_mcp_server.py", "NEWS_MCP_SERVER_PORT", news_port, env))
+            stock_urls.append(f"http://127.0.0.1:{stock_port}/sse")
+            news_urls.append(f"http://127.0.0.1:{news_port}/sse")
+
+        targets = []
+        for s in range(sessions):
+            targets.append((stock_urls[s % replicas], STOCK_CALLS))
+            targets.append((news_urls[s % replicas], NEWS_CALLS))
+        return asyncio.run(drive(targets, calls))
+    finally:
+        stop_servers(processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show MCP server throughput scaling with replica count")
+    parser.add_argument("--replicas", default="1,2,4", help="Comma-separated replica counts to compare")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent client sessions per server type")
+    parser.add_argument("--calls", type=int, default=20, help="Tool calls per session")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Mock upstream latency")
+    parser.add_argument("--cache", choices=["sqlite", "none"], default="sqlite", help="Shared cache backend for the replicas")
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for replicas in [int(r) for r in args.replicas.split(",")]:
+            mock_config = MockConfig(args.latency_ms, args.latency_ms / 5, 0.0, 42)
+            mock_server, mock_env = start_mock_upstreams(config=mock_config)
+            mock_env["CACHE_BACKEND"] = args.cache
+            try:
+                run = run_with_replicas(replicas, args.sessions, args.calls, mock_env, cache_dir)
+            finally:
+                mock_server.shutdown()
+            # With a shared cache, upstream calls should stay flat as replicas are added
+            run["upstream_requests"] = dict(mock_config.request_counts)
+            results[f"replicas_{replicas}"] = run
+            print(f"{replicas} replica(s): {run['overall']['throughput_per_s']} calls/s, "
+                  f"p95 {run['overall']['p95_ms']} ms, upstream {run['upstream_requests']}")
+
+    write_results("scaling", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import Dict, List, Any
+
+from bench_utils import SRC_DIR, write_results
+
+
+MODULES = ["news_mcp_server", "stock_mcp_server"]
+
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse `python -X importtime` output into (module, self_us, cumulative_us, depth) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append({
+            "module": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "depth": depth,
+        })
+    return rows
+
+
+def measure_import(module: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """Import `module` in a fresh interpreter and report wall time plus the heaviest imports."""
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SRC_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_time = time.perf_counter() - start
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "import failed"}
+    rows = parse_importtime(process.stderr)
+    return {
+        "wall_time_ms": round(wall_time * 1000, 1),
+        "import_time_ms": round(sum(row["self_us"] for row in rows) / 1000, 1),
+        "modules_imported": len(rows),
+        # Top-level packages (depth 1 in the tree) by cumulative cost
+        "heaviest": [
+            {"module": row["module"], "cumulative_ms": round(row["cumulative_us"] / 1000, 1)}
+            for row in sorted((row for row in rows if row["depth"] == 1), key=lambda r: r["cumulative_us"], reverse=True)[:15]
+        ],
+        "loaded": sorted({row["module"].split(".")[0] for row in rows}),
+    }
+
+
+def measure_warm_up(module: str, env: Dict[str, str]) -> Dict[str, Any]:
+    """Time the optional warm-up hook separately from the import."""
+    code = f"import time, {module} as m; t = time.perf_counter(); m.warm_up(); print(time.perf_counter() - t)"
+    process = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        return {"error": process.stderr.strip().splitlines()[-1] if process.stderr.strip() else "warm-up failed"}
+    return {"warm_up_ms": round(float(process.stdout.strip().splitlines()[-1]) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure MCP server startup cost with python -X importtime")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module; the median is reported")
+    parser.add_argument("--warm-up", action="store_true", help="Also time each server's warm_up() hook")
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env["TRACING_ENABLED"] = "false"
+
+    results = {}
+    for module in MODULES:
+        runs = [measure_import(module, env) for _ in range(args.repeat)]
+        ok = [run for run in runs if "error" not in run]
+        if not ok:
+            results[module] = runs[0]
+            print(f"{module}: {runs[0]['error']}")
+            continue
+        median = sorted(ok, key=lambda run: run["import_time_ms"])[len(ok) // 2]
+        median["wall_time_ms_runs"] = [run["wall_time_ms"] for run in ok]
+        if args.warm_up:
+            median.update(measure_warm_up(module, env))
+        results[module] = median
+        print(f"{module}: import {median['import_time_ms']} ms, wall {median['wall_time_ms']} ms, "
+              f"{median['modules_imported']} modules")
+
+    write_results("startup", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
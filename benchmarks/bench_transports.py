@@ -0,0 +1,105 @@
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+
+from mcp import StdioServerParameters
+
+from bench_utils import SRC_DIR, write_results, free_port, start_server, stop_servers, count_connections
+from bench_mcp_servers import STOCK_CALLS, NEWS_CALLS, drive
+from mock_upstreams import MockConfig, start_mock_upstreams
+
+
+# (label, transport, stateless) combinations to compare
+TRANSPORTS = [
+    ("sse", "sse", False),
+    ("streamable-http-stateless", "streamable-http", True),
+    ("streamable-http-stateful", "streamable-http", False),
+    ("stdio", "stdio", False),
+]
+
+
+async def drive_with_connection_sampling(targets, calls: int, transport: str, ports, interval: float = 0.05) -> dict:
+    """Run the load while sampling how many TCP connections the clients hold open."""
+    samples = []
+    done = asyncio.Event()
+
+    async def sample():
+        while not done.is_set():
+            samples.append(count_connections(ports))
+            await asyncio.sleep(interval)
+
+    sampler = asyncio.create_task(sample())
+    try:
+        results = await drive(targets, calls, transport)
+    finally:
+        done.set()
+        await sampler
+    results["connections"] = {
+        "max": max(samples) if samples else 0,
+        "mean": round(sum(samples) / len(samples), 2) if samples else 0,
+    }
+    return results
+
+
+def run_transport(label: str, transport: str, stateless: bool, sessions: int, calls: int, mock_env: dict, cache_dir: str) -> dict:
+    env = dict(mock_env)
+    env["TRACING_ENABLED"] = "false"
+    env["MCP_TRANSPORT"] = transport
+    env["MCP_STATELESS_HTTP"] = "true" if stateless else "false"
+    env["CACHE_DB_PATH"] = os.path.join(cache_dir, f"{label}.sqlite3")
+
+    processes = []
+    try:
+        if transport == "stdio":
+            # Every session owns its own server subprocess talking over pipes
+            def params(script):
+                return StdioServerParameters(command=sys.executable, args=[os.path.join(SRC_DIR, script)], env={**os.environ, **env})
+            stock, news, ports = params("stock_mcp_server.py"), params("news_mcp_server.py"), []
+        else:
+            stock_port, news_port = free_port(), free_port()
+            processes.append(start_server("stock_mcp_server.py", "STOCK_MCP_SERVER_PORT", stock_port, env))
+            processes.append(start_server("news_mcp_server.py", "NEWS_MCP_SERVER_PORT", news_port, env))
+            path = "mcp" if transport == "streamable-http" else "sse"
+            stock, news = f"http://127.0.0.1:{stock_port}/{path}", f"http://127.0.0.1:{news_port}/{path}"
+            ports = [stock_port, news_port]
+
+        targets = [(stock, STOCK_CALLS), (news, NEWS_CALLS)] * sessions
+        results = asyncio.run(drive_with_connection_sampling(targets, calls, transport, ports))
+        client_count = len(targets)
+        results["connections"]["per_client_max"] = round(results["connections"]["max"] / client_count, 2)
+        return results
+    finally:
+        stop_servers(processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare MCP transports: per-call latency and connections held per client")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent client sessions per server")
+    parser.add_argument("--calls", type=int, default=20, help="Tool calls per session")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Mock upstream latency")
+    parser.add_argument("--transports", default=",".join(label for label, _, _ in TRANSPORTS))
+    parser.add_argument("--output", default=None, help="Result JSON path")
+    args = parser.parse_args()
+
+    selected = set(args.transports.split(","))
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label, transport, stateless in TRANSPORTS:
+            if label not in selected:
+                continue
+            mock_server, mock_env = start_mock_upstreams(config=MockConfig(args.latency_ms, args.latency_ms / 5, 0.0, 42))
+            try:
+                run = run_transport(label, transport, stateless, args.sessions, args.calls, mock_env, cache_dir)
+            finally:
+                mock_server.shutdown()
+            results[label] = run
+            print(f"{label}: p50 {run['overall']['p50_ms']} ms, p95 {run['overall']['p95_ms']} ms, "
+                  f"{run['overall']['throughput_per_s']} calls/s, connections/client {run['connections']['per_client_max']}")
+
+    write_results("transports", vars(args), results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import json
+import time
+import socket
+import platform
+import datetime
+import subprocess
+from typing import Dict, List, Any, Optional
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+RESULTS_DIR = os.getenv("BENCH_RESULTS_DIR", os.path.join(REPO_ROOT, "benchmarks", "results"))
+
+# Make the server modules importable for in-process benchmarks
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = (len(sorted_values) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def summarize(latencies: List[float], wall_time: float, errors: int = 0) -> Dict[str, Any]:
+    """p50/p95/p99 in milliseconds plus throughput for a set of latencies in seconds."""
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "count": count,
+        "errors": errors,
+        "p50_ms": round(percentile(values, 50) * 1000, 3),
+        "p95_ms": round(percentile(values, 95) * 1000, 3),
+        "p99_ms": round(percentile(values, 99) * 1000, 3),
+        "mean_ms": round(sum(values) / count * 1000, 3) if count else 0.0,
+        "max_ms": round(values[-1] * 1000, 3) if count else 0.0,
+        "throughput_per_s": round(count / wall_time, 2) if wall_time > 0 else 0.0,
+    }
+
+
+def write_results(name: str, config: Dict[str, Any], results: Dict[str, Any], output: Optional[str] = None) -> str:
+    """Write a benchmark run as JSON so runs can be compared later."""
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    path = output or os.path.join(RESULTS_DIR, f"{name}_{timestamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    report = {
+        "benchmark": name,
+        "generated_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {
+            "python_version": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": config,
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
+    return path
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Nothing listening on port {port} after {timeout}s")
+
+
+def count_connections(ports: List[int]) -> int:
+    """
+    Established TCP connections from this host to any of `ports`.
+
+    Reads /proc/net/tcp, so it only works on Linux; elsewhere it returns -1.
+    """
+    total = 0
+    found = False
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                rows = f.readlines()[1:]
+        except OSError:
+            continue
+        found = True
+        for row in rows:
+            fields = row.split()
+            remote_port = int(fields[2].rsplit(":", 1)[1], 16)
+            # State 01 is ESTABLISHED; match the client side of the connection
+            if fields[3] == "01" and remote_port in ports:
+                total += 1
+    return total if found else -1
+
+
+def start_server(script: str, port_env: str, port: int, env: Dict[str, str]) -> subprocess.Popen:
+    """Launch one of the MCP server scripts from src/ and wait until it accepts connections."""
+    server_env = dict(os.environ)
+    server_env.update(env)
+    server_env[port_env] = str(port)
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SRC_DIR, script)],
+        cwd=REPO_ROOT,
+        env=server_env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+    except TimeoutError:
+        process.terminate()
+        raise
+    return process
+
+
+def stop_servers(processes: List[subprocess.Popen]):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
@@ -0,0 +1,217 @@
+import json
+import time
+import random
+import argparse
+import datetime
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional
+
+
+# Local stand-ins for AlphaVantage, NewsAPI, restcountries and the phone-verification API.
+# Response shapes follow the real APIs closely enough for the MCP tools to parse them.
+
+COUNTRIES = {
+    "india": ("India", "New Delhi", "Asia", "IN", ".in", "INR", "Indian rupee", "₹", 1380004385),
+    "united states": ("United States", "Washington, D.C.", "Americas", "US", ".us", "USD", "United States dollar", "$", 329484123),
+    "usa": ("United States", "Washington, D.C.", "Americas", "US", ".us", "USD", "United States dollar", "$", 329484123),
+    "united kingdom": ("United Kingdom", "London", "Europe", "GB", ".uk", "GBP", "British pound", "£", 67215293),
+    "germany": ("Germany", "Berlin", "Europe", "DE", ".de", "EUR", "Euro", "€", 83240525),
+    "france": ("France", "Paris", "Europe", "FR", ".fr", "EUR", "Euro", "€", 67391582),
+    "japan": ("Japan", "Tokyo", "Asia", "JP", ".jp", "JPY", "Japanese yen", "¥", 125836021),
+    "australia": ("Australia", "Canberra", "Oceania", "AU", ".au", "AUD", "Australian dollar", "$", 25687041),
+    "canada": ("Canada", "Ottawa", "Americas", "CA", ".ca", "CAD", "Canadian dollar", "$", 38005238),
+}
+
+
+class MockConfig:
+    """Latency and failure injection shared by all routes."""
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 10.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_counts: Dict[str, int] = {}
+
+    def delay(self) -> float:
+        with self.lock:
+            jitter = self.random.uniform(-self.jitter_ms, self.jitter_ms)
+        return max(0.0, self.latency_ms + jitter) / 1000
+
+    def should_fail(self) -> bool:
+        with self.lock:
+            return self.random.random() < self.failure_rate
+
+    def count(self, route: str):
+        with self.lock:
+            self.request_counts[route] = self.request_counts.get(route, 0) + 1
+
+
+def _stock_payload(symbol: str, interval: str) -> Dict[str, Any]:
+    now = datetime.datetime(2025, 1, 2, 16, 0)
+    step = int(interval.replace("min", "")) if interval.endswith("min") else 5
+    series = {}
+    price = 150.0
+    for i in range(100):
+        ts = (now - datetime.timedelta(minutes=step * i)).strftime("%Y-%m-%d %H:%M:%S")
+        series[ts] = {
+            "1. open": f"{price:.4f}",
+            "2. high": f"{price + 0.5:.4f}",
+            "3. low": f"{price - 0.5:.4f}",
+            "4. close": f"{price + 0.1:.4f}",
+            "5. volume": str(1000 + i * 10),
+        }
+        price -= 0.05
+    return {
+        "Meta Data": {
+            "1. Information": "Intraday (5min) open, high, low, close prices and volume",
+            "2. Symbol": symbol,
+            "3. Last Refreshed": now.strftime("%Y-%m-%d %H:%M:%S"),
+            "4. Interval": interval,
+            "5. Output Size": "Compact",
+            "6. Time Zone": "US/Eastern",
+        },
+        f"Time Series ({interval})": series,
+    }
+
+
+def _news_payload(country: str) -> Dict[str, Any]:
+    articles = []
+    for i in range(20):
+        articles.append({
+            "source": {"id": None, "name": f"Mock Source {i % 5}"},
+            "author": f"Reporter {i}",
+            "title": f"Headline {i} for {country.upper()}",
+            "description": "A short description of the story. " * 3,
+            "url": f"https://news.example.com/{country}/{i}",
+            "urlToImage": f"https://news.example.com/{country}/{i}.jpg",
+            "publishedAt": "2025-01-02T10:00:00Z",
+            "content": "Body text of the article. " * 20,
+        })
+    return {"status": "ok", "totalResults": len(articles), "articles": articles}
+
+
+def _country_payload(name: str):
+    entry = COUNTRIES.get(name.lower())
+    if entry is None:
+        return None
+    common, capital, region, cca2, tld, code, currency, symbol, population = entry
+    return [{
+        "name": {"common": common, "official": common},
+        "capital": [capital],
+        "region": region,
+        "cca2": cca2,
+        "tld": [tld],
+        "currencies": {code: {"name": currency, "symbol": symbol}},
+        "population": population,
+    }]
+
+
+def _phone_payload(phone: str, country: str) -> Dict[str, Any]:
+    digits = "".join(c for c in phone if c.isdigit())
+    return {
+        "phone": digits,
+        "valid": len(digits) >= 8,
+        "format": {"international": f"+{digits}", "local": digits},
+        "country": {"code": country, "name": country, "prefix": ""},
+        "location": "Mock Location",
+        "type": "mobile",
+        "carrier": "Mock Carrier",
+    }
+
+
+def make_handler(config: MockConfig):
+    class MockHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: Any):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+            route = parsed.path.strip("/").split("/")[0]
+            config.count(route)
+
+            time.sleep(config.delay())
+            if config.should_fail():
+                self._send(503, {"error": "injected failure"})
+                return
+
+            if route == "alphavantage":
+                self._send(200, _stock_payload(query.get("symbol", "IBM"), query.get("interval", "5min")))
+            elif route == "newsapi":
+                self._send(200, _news_payload(query.get("country", "us")))
+            elif route == "countries":
+                name = unquote(parsed.path.rstrip("/").split("/")[-1])
+                body = _country_payload(name)
+                if body is None:
+                    self._send(404, {"status": 404, "message": "Not Found"})
+                else:
+                    self._send(200, body)
+            elif route == "phone":
+                self._send(200, _phone_payload(query.get("phone", ""), query.get("country", "")))
+            else:
+                self._send(404, {"error": f"unknown route {parsed.path}"})
+
+    return MockHandler
+
+
+def upstream_env(port: int, host: str = "127.0.0.1") -> Dict[str, str]:
+    """Environment variables that point both MCP servers at the mocks."""
+    base = f"http://{host}:{port}"
+    return {
+        "ALPHAVANTAGE_BASE_URL": f"{base}/alphavantage/query",
+        "ALPHAVANTAGE_API_KEY": "mock",
+        "NEWS_BASE_URL": f"{base}/newsapi/top-headlines",
+        "NEWS_API_KEY": "mock",
+        "COUNTRY_BASE_URL": f"{base}/countries/name/",
+        "PHONE_VERIFY_BASE_URL": f"{base}/phone/",
+        "PHONE_VERIFY_KEY": "mock",
+        # Real-API rate limits from .env would throttle the benchmarks
+        "ALPHAVANTAGE_RATE_LIMIT": "",
+        "NEWS_API_RATE_LIMIT": "",
+        "PHONE_VERIFY_RATE_LIMIT": "",
+    }
+
+
+def start_mock_upstreams(port: int = 0, config: Optional[MockConfig] = None, host: str = "127.0.0.1"):
+    """Start the mocks on a background thread; returns (server, env)."""
+    config = config or MockConfig()
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, upstream_env(server.server_address[1], host)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run local upstream API stand-ins")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency_ms, args.jitter_ms, args.failure_rate, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(config))
+    server.daemon_threads = True
+    print("Mock upstreams listening; export these to point the MCP servers at them:")
+    for key, value in upstream_env(args.port, args.host).items():
+        print(f"{key}={value}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,8 +1,12 @@
 import gradio as gr
 import asyncio
 from pydantic_ai import Agent
-from pydantic_ai.mcp import MCPServerHTTP
 import os
+from contextlib import AsyncExitStack
+from telemetry import span, trace_headers
+from mcp_transports import mcp_server_url, build_mcp_server
+from model_backends import REPLAY_PROVIDER, REPLAY_MODELS, REPLAY_TRANSCRIPTS, resolve_model, record_transcript
+from token_accounting import usage_summary, format_usage
 from datetime import datetime
 
 # Environment variables
@@ -10,10 +14,10 @@ ANTHROPIC_API_KEY = os.getenv('ANTHROPIC_API_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 STOCK_MCP_SERVER_PORT = os.getenv("STOCK_MCP_SERVER_PORT", "8001")
 STOCK_MCP_SERVER_HOST = os.getenv("STOCK_MCP_SERVER_HOST", "stock-mcp-server")  
-STOCK_MCP_SERVER_URL = f"http://{STOCK_MCP_SERVER_HOST}:{STOCK_MCP_SERVER_PORT}/sse"
+STOCK_MCP_SERVER_URL = mcp_server_url(STOCK_MCP_SERVER_HOST, STOCK_MCP_SERVER_PORT)
 NEWS_MCP_SERVER_PORT = os.getenv("NEWS_MCP_SERVER_PORT", "8001")
 NEWS_MCP_SERVER_HOST = os.getenv("NEWS_MCP_SERVER_HOST", "stock-mcp-server")  
-NEWS_MCP_SERVER_URL = f"http://{NEWS_MCP_SERVER_HOST}:{NEWS_MCP_SERVER_PORT}/sse"
+NEWS_MCP_SERVER_URL = mcp_server_url(NEWS_MCP_SERVER_HOST, NEWS_MCP_SERVER_PORT)
 GRADIO_SERVER_PORT = os.getenv('GRADIO_SERVER_PORT', '7860')  
 
 # Model lists
@@ -30,28 +34,44 @@ OPENAI_MODELS = [
     "gpt-4",
     "gpt-3.5-turbo"
 ]
+MODELS_BY_PROVIDER = {"anthropic": ANTHROPIC_MODELS, "openai": OPENAI_MODELS}
+# The replay backend is offered when a transcript file is available
+if os.path.exists(REPLAY_TRANSCRIPTS):
+    MODELS_BY_PROVIDER[REPLAY_PROVIDER] = REPLAY_MODELS
 
-# Global agent cache
-agent_cache = {}
+# Global model cache
+model_cache = {}
 
-def setup_agent(llm_provider: str, model: str):
-    if f"{llm_provider}:{model}" not in agent_cache:
-        server_1 = MCPServerHTTP(url=STOCK_MCP_SERVER_URL)
-        server_2 = MCPServerHTTP(url=NEWS_MCP_SERVER_URL)
-        agent_id = f"{llm_provider}:{model}"
-        agent_cache[agent_id] = Agent(agent_id, mcp_servers=[server_1, server_2])
-    return agent_cache[f"{llm_provider}:{model}"]
+def setup_agent(llm_provider: str, model: str, headers=None):
+    # MCP server objects are built per query, so concurrent queries never share their headers
+    model_id = f"{llm_provider}:{model}"
+    if model_id not in model_cache:
+        model_cache[model_id] = resolve_model(llm_provider, model)
+    server_1 = build_mcp_server(STOCK_MCP_SERVER_URL, "stock_mcp_server.py", headers=headers)
+    server_2 = build_mcp_server(NEWS_MCP_SERVER_URL, "news_mcp_server.py", headers=headers)
+    return Agent(model_cache[model_id], mcp_servers=[server_1, server_2])
 
 async def process_query(query: str, llm_provider: str, model: str):
-    agent = setup_agent(llm_provider, model)
-    try:
-        async with agent.run_mcp_servers():
-            result = await agent.run(query)
-            response = str(result.data)
-            reasoning = "Reasoning not available"
-        return response, reasoning
-    except Exception as e:
-        return f"An error occurred: {str(e)}", "Error occurred during processing"
+    with span("process_query", frontend="gradio", llm_provider=llm_provider, model=model) as root:
+        try:
+            # The trace context travels in this query's own MCP connection headers
+            agent = setup_agent(llm_provider, model, trace_headers())
+            async with AsyncExitStack() as stack:
+                with span("mcp.connect"):
+                    await stack.enter_async_context(agent.run_mcp_servers())
+                with span("agent.run"):
+                    result = await agent.run(query)
+                if llm_provider != REPLAY_PROVIDER:
+                    record_transcript(query, result.all_messages())
+                response = str(result.data)
+                reasoning = "Reasoning not available"
+                usage = usage_summary(result)
+                root.set_attribute("input_tokens", usage["input_tokens"])
+                root.set_attribute("output_tokens", usage["output_tokens"])
+            return response, reasoning, usage
+        except Exception as e:
+            root.set_error(e)
+            return f"An error occurred: {str(e)}", "Error occurred during processing", None
 
 def chat_handler(message, history, llm_provider, model):
     timestamp = datetime.now().strftime("%H:%M:%S")
@@ -65,11 +85,13 @@ def chat_handler(message, history, llm_provider, model):
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     try:
-        response, reasoning = loop.run_until_complete(process_query(message, llm_provider, model))
+        response, reasoning, usage = loop.run_until_complete(process_query(message, llm_provider, model))
         assistant_timestamp = datetime.now().strftime("%H:%M:%S")
         response_text = f"**Assistant** ({assistant_timestamp}): {response}"
         if reasoning != "Reasoning not available":
             response_text += f"\n\n**Reasoning**: {reasoning}"
+        if usage:
+            response_text += f"\n\n**Usage**: {format_usage(usage)}"
         
         # Add assistant response using dictionary format
         history.append({
@@ -95,7 +117,7 @@ with gr.Blocks(title="MCP Gradio Chatbot", css=".gradio-container {background-co
     with gr.Row():
         with gr.Column(scale=1):
             llm_provider = gr.Dropdown(
-                choices=["anthropic", "openai"],
+                choices=list(MODELS_BY_PROVIDER),
                 label="LLM Provider",
                 value="anthropic"
             )
@@ -105,7 +127,8 @@ with gr.Blocks(title="MCP Gradio Chatbot", css=".gradio-container {background-co
                 value=ANTHROPIC_MODELS[0]
             )
             def update_models(provider):
-                return gr.update(choices=ANTHROPIC_MODELS if provider == "anthropic" else OPENAI_MODELS)
+                models = MODELS_BY_PROVIDER[provider]
+                return gr.update(choices=models, value=models[0])
             llm_provider.change(update_models, inputs=llm_provider, outputs=model)
             
         with gr.Column(scale=3):
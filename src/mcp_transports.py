@@ -0,0 +1,39 @@
+import os
+import sys
+from typing import Dict, Optional
+
+from pydantic_ai.mcp import MCPServerHTTP, MCPServerStdio
+
+
+# Environment variables
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "sse")  # sse, streamable-http or stdio
+MCP_TRANSPORTS = ["sse", "streamable-http", "stdio"]
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def mcp_server_url(host: str, port: str, transport: str = MCP_TRANSPORT) -> str:
+    """Endpoint URL of an MCP server for the given transport."""
+    path = "mcp" if transport == "streamable-http" else "sse"
+    return f"http://{host}:{port}/{path}"
+
+
+def build_mcp_server(url: str, script: str, transport: str = MCP_TRANSPORT, headers: Optional[Dict[str, str]] = None):
+    """
+    pydantic-ai MCP server for the configured transport.
+
+    `headers` are sent on every HTTP request of the connection; stdio has
+    none. In stdio mode the server script is started as a subprocess of the
+    chat app, which is meant for single-box runs without the server containers.
+    """
+    if transport == "streamable-http":
+        # Only available in newer pydantic-ai releases
+        from pydantic_ai.mcp import MCPServerStreamableHTTP
+        return MCPServerStreamableHTTP(url=url, headers=headers)
+    if transport == "stdio":
+        env = dict(os.environ)
+        env["MCP_TRANSPORT"] = "stdio"
+        return MCPServerStdio(sys.executable, [os.path.join(SRC_DIR, script)], env=env)
+    if transport != "sse":
+        raise ValueError(f"Unknown MCP transport: {transport}")
+    return MCPServerHTTP(url=url, headers=headers)
@@ -0,0 +1,155 @@
+import os
+import json
+import asyncio
+import threading
+import zlib
+from typing import Dict, List, Any, Optional
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+
+# Environment variables
+REPLAY_TRANSCRIPTS = os.getenv("REPLAY_TRANSCRIPTS", "benchmarks/transcripts/sample.jsonl")
+REPLAY_DELAY_SCALE = float(os.getenv("REPLAY_DELAY_SCALE", "1.0"))
+RECORD_TRANSCRIPTS = os.getenv("RECORD_TRANSCRIPTS", "")
+
+# Local provider that replays recorded tool-calling transcripts instead of calling an LLM
+REPLAY_PROVIDER = "replay"
+REPLAY_MODELS = ["replay"]
+
+_record_lock = threading.Lock()
+
+
+def load_transcripts(path: str) -> List[Dict[str, Any]]:
+    """
+    Load replay transcripts from a JSONL file.
+
+    Each line looks like:
+    {"query": "...", "turns": [{"delay": 0.8, "tool_calls": [{"tool_name": "get_stock_data", "args": {"symbol": "IBM"}}]},
+                               {"delay": 1.2, "text": "IBM closed at ..."}]}
+    """
+    transcripts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                transcripts.append(json.loads(line))
+    if not transcripts:
+        raise ValueError(f"No transcripts found in {path}")
+    return transcripts
+
+
+def _user_prompt(messages: List[ModelMessage]) -> str:
+    for message in messages:
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, UserPromptPart) and isinstance(part.content, str):
+                    return part.content
+    return ""
+
+
+def _tool_returns(messages: List[ModelMessage]) -> List[ToolReturnPart]:
+    return [
+        part
+        for message in messages
+        if isinstance(message, ModelRequest)
+        for part in message.parts
+        if isinstance(part, ToolReturnPart)
+    ]
+
+
+def build_replay_model(path: str = REPLAY_TRANSCRIPTS, delay_scale: float = REPLAY_DELAY_SCALE) -> FunctionModel:
+    """
+    A model that replays transcripts against the real MCP tools.
+
+    The transcript is chosen by exact query match, falling back to one
+    picked from a hash of the query, so every turn of a run replays the
+    same transcript. Each scripted turn sleeps for its recorded delay.
+    """
+    transcripts = load_transcripts(path)
+    by_query = {t["query"]: t for t in transcripts if t.get("query")}
+
+    async def replay(messages: List[ModelMessage], info: AgentInfo) -> ModelResponse:
+        # Keyed on the run's first user prompt, which is the same on every model request of the run
+        query = _user_prompt(messages)
+        transcript = by_query.get(query) or transcripts[zlib.crc32(query.encode("utf-8")) % len(transcripts)]
+        turn_index = sum(1 for message in messages if isinstance(message, ModelResponse))
+        turns = transcript.get("turns", [])
+
+        if turn_index >= len(turns):
+            # Transcript ran out before a final answer; close the turn with the tool results seen so far
+            returns = _tool_returns(messages)
+            text = "\n".join(f"{part.tool_name}: {part.model_response_str()}" for part in returns) or "No response recorded"
+            return ModelResponse(parts=[TextPart(text)], model_name="replay")
+
+        turn = turns[turn_index]
+        await asyncio.sleep(float(turn.get("delay", 0)) * delay_scale)
+
+        known_tools = {tool.name for tool in info.function_tools}
+        tool_calls = [call for call in turn.get("tool_calls", []) if call.get("tool_name") in known_tools]
+        if tool_calls:
+            parts = [
+                ToolCallPart(tool_name=call["tool_name"], args=call.get("args", {}), tool_call_id=f"replay-{turn_index}-{i}")
+                for i, call in enumerate(tool_calls)
+            ]
+            return ModelResponse(parts=parts, model_name="replay")
+        return ModelResponse(parts=[TextPart(turn.get("text", ""))], model_name="replay")
+
+    return FunctionModel(replay, model_name="replay")
+
+
+def resolve_model(llm_provider: str, model: str):
+    """Model argument for `Agent`: a provider:model id, or the local replay backend."""
+    if llm_provider == REPLAY_PROVIDER:
+        return build_replay_model()
+    return f"{llm_provider}:{model}"
+
+
+def transcript_from_messages(query: str, messages: List[ModelMessage]) -> Dict[str, Any]:
+    """Convert a finished agent run into a replay transcript, keeping per-turn model latency."""
+    turns = []
+    last_request_time = None
+    for message in messages:
+        if isinstance(message, ModelRequest):
+            timestamps = [part.timestamp for part in message.parts if getattr(part, "timestamp", None)]
+            last_request_time = max(timestamps) if timestamps else last_request_time
+        elif isinstance(message, ModelResponse):
+            delay = (message.timestamp - last_request_time).total_seconds() if last_request_time else 0.0
+            tool_calls = [
+                {"tool_name": part.tool_name, "args": part.args_as_dict()}
+                for part in message.parts
+                if isinstance(part, ToolCallPart)
+            ]
+            turn = {"delay": round(max(delay, 0.0), 3)}
+            if tool_calls:
+                turn["tool_calls"] = tool_calls
+            else:
+                turn["text"] = "".join(part.content for part in message.parts if isinstance(part, TextPart))
+            turns.append(turn)
+    return {"query": query, "turns": turns}
+
+
+def record_transcript(query: str, messages: List[ModelMessage], path: Optional[str] = None):
+    """Append a real run to RECORD_TRANSCRIPTS so it can be replayed later; no-op when unset."""
+    path = path or RECORD_TRANSCRIPTS
+    if not path:
+        return
+    try:
+        transcript = transcript_from_messages(query, messages)
+        record_dir = os.path.dirname(path)
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+        with _record_lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(transcript, default=str) + "\n")
+    except Exception as e:
+        print(f"Error recording transcript: {e}")
@@ -1,16 +1,19 @@
 import os
-import platform
+import sys
 import requests
 import re
 import json
 import datetime
-import tiktoken 
 import random
-import newsapi
-from newsapi import NewsApiClient
+import functools
+import base64
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
+from telemetry import span, traced_tool, traced_get, register_metrics_route
+from shared_cache import SharedCache, RateLimiter, parse_rate_limit
+from token_accounting import budgeted_response, count_tokens
+from report_jobs import REPORTS_DIR, ReportJobs, content_hash, reports_dir, write_report_file, read_report_file, prune_reports
 
 
 # Load environment variables
@@ -21,13 +24,21 @@ NEWS_API_KEY = os.getenv("NEWS_API_KEY")
 NEWS_BASE_URL = os.getenv("NEWS_BASE_URL", "https://newsapi.org/v2/top-headlines")
 MCP_SERVER_PORT = os.getenv("NEWS_MCP_SERVER_PORT", "8002")
 MCP_SERVER_URL = f"http://localhost:{MCP_SERVER_PORT}"
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "sse")  # sse, streamable-http or stdio
+MCP_STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "true").lower() in ("1", "true", "yes")
+MCP_WARMUP = os.getenv("MCP_WARMUP", "false").lower() in ("1", "true", "yes")
+NEWS_CACHE_TTL = int(os.getenv("NEWS_CACHE_TTL", "300"))
+COUNTRY_CACHE_TTL = int(os.getenv("COUNTRY_CACHE_TTL", "86400"))
+NEWS_API_RATE_LIMIT = os.getenv("NEWS_API_RATE_LIMIT", "")
 
+# Caches and rate limits live in the shared backend so replicas don't duplicate upstream calls
+news_cache = SharedCache("news", NEWS_CACHE_TTL)
+country_cache = SharedCache("country", COUNTRY_CACHE_TTL)
+news_api_limiter = RateLimiter("newsapi", *parse_rate_limit(NEWS_API_RATE_LIMIT))
+report_jobs = ReportJobs()
 
-# Common utility functions
 
-def get_full_path(path: str) -> str:
-    """Convert a path to an absolute path."""
-    return os.path.abspath(os.path.expanduser(path))
+# Common utility functions
 
 def format_error_response(error: str, details: Optional[str] = None) -> Dict[str, Any]:
     """Format a standardized error response."""
@@ -36,6 +47,21 @@ def format_error_response(error: str, details: Optional[str] = None) -> Dict[str
         response["details"] = details
     return response
 
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Tokenizer for a model; tiktoken is imported on first use to keep server startup fast."""
+    import tiktoken
+    return tiktoken.encoding_for_model(model)
+
+def warm_up():
+    """Load lazily imported dependencies ahead of the first tool call (enabled with MCP_WARMUP)."""
+    try:
+        _get_encoding("gpt-3.5-turbo")
+    except Exception as e:
+        # Failures aren't cached, so calculate_token_length retries on its first call
+        print(f"[tiktoken warm-up failed, loading on first use instead: {e}]", file=sys.stderr)
+    count_tokens("warm-up")
+
 def _format_report_content(title: str, content: Dict[str, Any], format: str) -> str:
     """Helper function to format report content based on the specified format."""
     current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -117,15 +143,24 @@ mcp = FastMCP(
     debug=False,
     log_level="INFO",
     host="0.0.0.0",
-    port=int(MCP_SERVER_PORT) 
+    port=int(MCP_SERVER_PORT),
+    # Stateless streamable HTTP keeps no per-client session, so any replica can answer any call
+    stateless_http=MCP_STATELESS_HTTP,
+    json_response=MCP_STATELESS_HTTP
 )
+register_metrics_route(mcp)
 
 # Custom Function 1
 @mcp.tool()
+@traced_tool
+@budgeted_response
 def get_country_info_custom(country_name):
+    cached = country_cache.get(country_name.lower())
+    if cached is not None:
+        return cached
     url = COUNTRY_BASE_URL + country_name
     try:
-        response = requests.get(url)
+        response = traced_get(url)
         response.raise_for_status()  # Raises an HTTPError for bad responses
         data = response.json()
         # Extract first result
@@ -137,7 +172,7 @@ def get_country_info_custom(country_name):
         currency_name = currencies[currency_code]["name"] if currencies else "N/A"
         currency_symbol = currencies[currency_code]["symbol"] if currencies else "N/A"
         
-        return {
+        country_info = {
             "name": country["name"]["common"],
             "capital": country["capital"][0] if country.get("capital") else "N/A",
             "region": country.get("region", "N/A"),
@@ -147,6 +182,8 @@ def get_country_info_custom(country_name):
             "currency_symbol": currency_symbol,
             "population": country.get("population", "N/A")
         }
+        country_cache.set(country_name.lower(), country_info)
+        return country_info
     except requests.exceptions.RequestException as e:
         return f"Error: {str(e)}"
     except (IndexError, KeyError, TypeError):
@@ -154,6 +191,8 @@ def get_country_info_custom(country_name):
 
 # Custom Function 2
 @mcp.tool()
+@traced_tool
+@budgeted_response
 def calculate_token_length(text, model="gpt-3.5-turbo", show_tokens=False):
     """
     Calculate the number of tokens in a given text for a specified LLM model.
@@ -167,7 +206,7 @@ def calculate_token_length(text, model="gpt-3.5-turbo", show_tokens=False):
     - int: The number of tokens in the text.
     """
     # Get the encoding for the specified model
-    encoding = tiktoken.encoding_for_model(model)
+    encoding = _get_encoding(model)
     
     # Encode the text into tokens
     tokens = encoding.encode(text)
@@ -177,12 +216,14 @@ def calculate_token_length(text, model="gpt-3.5-turbo", show_tokens=False):
     
     # Optionally display token IDs
     if show_tokens:
-        print(f"Token IDs: {tokens}")
+        print(f"Token IDs: {tokens}", file=sys.stderr)
     
     return token_count
 
 # Custom Function 3
 @mcp.tool()
+@traced_tool
+@budgeted_response
 def analyze_text(text: str) -> Dict[str, Any]:
     """
     Analyze text to extract statistics and information.
@@ -229,9 +270,97 @@ def analyze_text(text: str) -> Dict[str, Any]:
     except Exception as e:
         return format_error_response(f"Failed to analyze text: {str(e)}")
     
+def _prepare_report(title: str, content: dict, format: str):
+    """Fill in a default title and sample content when missing, and validate the format."""
+    # Generate default title if none provided
+    if not title:
+        topics = ["Status Report", "Project Overview", "Weekly Summary", "Monthly Analysis", 
+                  "Performance Review", "System Health Check", "Progress Update"]
+        title = f"Auto-generated {random.choice(topics)}"
+        print(f"[Auto-generated title: {title}]", file=sys.stderr)
+    
+    # Generate sample content if none provided
+    if not content or not isinstance(content, dict):
+        import platform
+        current_time = datetime.datetime.now()
+        content = {
+            "Summary": "This is an automatically generated report with sample content.",
+            "Date Information": {
+                "Generation Date": current_time.strftime("%Y-%m-%d"),
+                "Generation Time": current_time.strftime("%H:%M:%S"),
+                "Day of Week": current_time.strftime("%A"),
+                "Month": current_time.strftime("%B")
+            },
+            "Sample Metrics": [
+                f"Metric A: {random.randint(75, 99)}%",
+                f"Metric B: {random.randint(50, 100)} units",
+                f"Metric C: {random.uniform(0.1, 0.9):.2f} ratio"
+            ],
+            "System Information": {
+                "OS": platform.system(),
+                "Python Version": platform.python_version(),
+                "Machine": platform.machine()
+            },
+            "Notes": "This content was automatically generated because no content was provided."
+        }
+        print("[Auto-generated sample content]", file=sys.stderr)
+        
+    valid_formats = ["markdown", "html", "txt", "json"]
+    if format.lower() not in valid_formats:
+        format = "markdown"
+        print(f"[Invalid format specified, defaulting to markdown]", file=sys.stderr)
+    return title, content, format.lower()
+
+def _report_filename(title: str, filename: str, format: str, suffix: str) -> str:
+    """Filename with the extension for the format, defaulting to title_suffix."""
+    if not filename:
+        # Create safe filename from title
+        safe_title = "".join(c if c.isalnum() else "_" for c in title).lower()
+        filename = f"{safe_title}_{suffix}"
+        
+    # Ensure filename doesn't have extension
+    filename = filename.split('.')[0]
+    
+    # Add appropriate extension based on format
+    ext_map = {
+        "markdown": "md",
+        "html": "html",
+        "txt": "txt",
+        "json": "json"
+    }
+    ext = ext_map.get(format, "md")
+    return f"{filename}.{ext}"
+
+def _save_report(title: str, content: Dict[str, Any], format: str, full_filename: str, compress: bool = False) -> Dict[str, Any]:
+    """Render a report and write it to the reports directory."""
+    # Create report content based on format
+    report_text = _format_report_content(title, content, format)
+        
+    # Save the report, then apply the retention limits on both the sync and async paths
+    saved = write_report_file(full_filename, report_text, compress)
+    prune_reports()
+        
+    # Return success info
+    return {
+        "status": "success",
+        "title": title,
+        "format": format,
+        "filename": saved["filename"],
+        "path": os.path.join(REPORTS_DIR, saved["filename"]),
+        "absolute_path": saved["absolute_path"],
+        "size_bytes": saved["size_bytes"],
+        "compressed": compress,
+        "sections": list(content.keys()),
+        "generated_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "auto_generated": not bool(title) or not bool(content)
+    }
+
 # Custom Function 4
 @mcp.tool()
-def generate_report(title: str = "", content: dict = None, format: str = "markdown", filename: str = "") -> Dict[str, Any]:
+@traced_tool
+@budgeted_response
+def generate_report(title: str = "", content: dict = None, format: str = "markdown", filename: str = "",
+                    async_job: bool = False, compress: bool = False) -> Dict[str, Any]:
     """
     Generate and save a formatted report. This tool can automatically generate content if not provided.
     
@@ -240,93 +369,39 @@ def generate_report(title: str = "", content: dict = None, format: str = "markdo
         content: Dictionary containing report content sections (if empty, will generate sample content)
         format: Output format (markdown, html, txt, json)
         filename: Optional filename (without extension), defaults to title_YYYYMMDD if empty
+        async_job: If True, render in the background and return a job ID to poll with get_report_status
+        compress: If True, save the report gzip-compressed (.gz)
     
     Returns:
-        Information about the saved report
+        Information about the saved report, or the queued job in async mode
     """
     try:
-        # Generate default title if none provided
-        if not title:
-            topics = ["Status Report", "Project Overview", "Weekly Summary", "Monthly Analysis", 
-                      "Performance Review", "System Health Check", "Progress Update"]
-            title = f"Auto-generated {random.choice(topics)}"
-            print(f"[Auto-generated title: {title}]")
-        
-        # Generate sample content if none provided
-        if not content or not isinstance(content, dict):
-            current_time = datetime.datetime.now()
-            content = {
-                "Summary": "This is an automatically generated report with sample content.",
-                "Date Information": {
-                    "Generation Date": current_time.strftime("%Y-%m-%d"),
-                    "Generation Time": current_time.strftime("%H:%M:%S"),
-                    "Day of Week": current_time.strftime("%A"),
-                    "Month": current_time.strftime("%B")
-                },
-                "Sample Metrics": [
-                    f"Metric A: {random.randint(75, 99)}%",
-                    f"Metric B: {random.randint(50, 100)} units",
-                    f"Metric C: {random.uniform(0.1, 0.9):.2f} ratio"
-                ],
-                "System Information": {
-                    "OS": platform.system(),
-                    "Python Version": platform.python_version(),
-                    "Machine": platform.machine()
-                },
-                "Notes": "This content was automatically generated because no content was provided."
-            }
-            print("[Auto-generated sample content]")
-            
-        valid_formats = ["markdown", "html", "txt", "json"]
-        if format.lower() not in valid_formats:
-            format = "markdown"
-            print(f"[Invalid format specified, defaulting to markdown]")
-            
-        # Generate default filename if none provided
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        title, content, format = _prepare_report(title, content, format)
+
+        if not async_job:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            full_filename = _report_filename(title, filename, format, timestamp)
+            return _save_report(title, content, format, full_filename, compress)
+
+        # Identical reports get the same hash-based filename, so they are rendered only once
+        report_hash = content_hash(title, content, format, compress)
+        full_filename = _report_filename(title, filename, format, report_hash[:12])
+        existing_path = None
         if not filename:
-            # Create safe filename from title
-            safe_title = "".join(c if c.isalnum() else "_" for c in title).lower()
-            filename = f"{safe_title}_{timestamp}"
-            
-        # Ensure filename doesn't have extension
-        filename = filename.split('.')[0]
-        
-        # Add appropriate extension based on format
-        format = format.lower()
-        ext_map = {
-            "markdown": "md",
-            "html": "html",
-            "txt": "txt",
-            "json": "json"
-        }
-        ext = ext_map.get(format, "md")
-        full_filename = f"{filename}.{ext}"
-        
-        # Create report content based on format
-        report_text = _format_report_content(title, content, format)
-            
-        # Save the report
-        reports_dir = get_full_path("reports")
-        os.makedirs(reports_dir, exist_ok=True)
-        
-        file_path = os.path.join(reports_dir, full_filename)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(report_text)
-            
-        # Return success info
-        rel_path = os.path.join("reports", full_filename)
+            existing_path = os.path.join(reports_dir(), full_filename + (".gz" if compress else ""))
+
+        def render():
+            with span("render_report", format=format, compressed=compress):
+                return _save_report(title, content, format, full_filename, compress)
+
+        job = report_jobs.submit(report_hash, existing_path, render)
+        if "error" in job:
+            return format_error_response(job["error"], "Wait for running report jobs to finish")
         return {
-            "status": "success",
-            "title": title,
-            "format": format,
-            "filename": full_filename,
-            "path": rel_path,
-            "absolute_path": file_path,
-            "size_bytes": len(report_text),
-            "sections": list(content.keys()),
-            "generated_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "auto_generated": not bool(title) or not bool(content)
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "deduplicated": job.get("deduplicated", False),
+            "message": "Poll get_report_status with this job_id, then download it with fetch_report"
         }
     except Exception as e:
         return format_error_response(
@@ -336,6 +411,8 @@ def generate_report(title: str = "", content: dict = None, format: str = "markdo
 
 # Custom Function 5
 @mcp.tool()
+@traced_tool
+@budgeted_response
 def get_news_by_region(country: str = "us") -> List[Dict[str, Any]]:
     """
     Fetch the latest news headlines for a specified country using NewsAPI.
@@ -343,7 +420,14 @@ def get_news_by_region(country: str = "us") -> List[Dict[str, Any]]:
     Returns:
     - list: List of dictionaries containing article details.
     """
-    url = "https://newsapi.org/v2/top-headlines"
+    cached = news_cache.get(country.lower())
+    if cached is not None:
+        return cached
+    # Fail fast: sync tools run on the server's event loop, so waiting here would stall every session
+    if not news_api_limiter.try_acquire():
+        return f"Error fetching news: rate limit exceeded, retry in {news_api_limiter.retry_after():.0f}s"
+
+    url = NEWS_BASE_URL
     params = {
         "country": country,
         "apiKey": NEWS_API_KEY
@@ -351,7 +435,7 @@ def get_news_by_region(country: str = "us") -> List[Dict[str, Any]]:
     
     try:
         # Make the GET request
-        response = requests.get(url, params=params)
+        response = traced_get(url, params=params)
         
         # Raise an exception if the request failed
         response.raise_for_status()
@@ -360,12 +444,64 @@ def get_news_by_region(country: str = "us") -> List[Dict[str, Any]]:
         data = response.json()
         
         # Return the articles
-        return data.get("articles", [])
+        articles = data.get("articles", [])
+        news_cache.set(country.lower(), articles)
+        return articles
         
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching news: {e}")
+        print(f"Error fetching news: {e}", file=sys.stderr)
         return f"Error fetching news: {e}"
   
     
+# Custom Function 6
+@mcp.tool()
+@traced_tool
+@budgeted_response(truncate=False)
+def get_report_status(job_id: str) -> Dict[str, Any]:
+    """
+    Check the status of a report job started with generate_report(async_job=True).
+    
+    Args:
+        job_id: The job ID returned by generate_report
+    
+    Returns:
+        The job record: status (queued, running, done, failed) and report details once done
+    """
+    job = report_jobs.get(job_id)
+    if job is None:
+        return format_error_response(f"Unknown report job: {job_id}", "Jobs are kept for the report retention period")
+    return job
+
+# Custom Function 7
+@mcp.tool()
+@traced_tool
+@budgeted_response(truncate=False)
+def fetch_report(job_id: str, raw: bool = False) -> Dict[str, Any]:
+    """
+    Download the rendered report of a finished job.
+    
+    Args:
+        job_id: The job ID returned by generate_report
+        raw: If True, return the stored file bytes base64-encoded (still gzip-compressed for .gz reports)
+    
+    Returns:
+        The report content, or the job status if it isn't finished
+    """
+    job = report_jobs.get(job_id)
+    if job is None:
+        return format_error_response(f"Unknown report job: {job_id}", "Jobs are kept for the report retention period")
+    if job["status"] != "done":
+        return job
+    report = job["report"]
+    try:
+        data = read_report_file(report["absolute_path"], decompress=not raw)
+    except OSError:
+        return format_error_response(f"Report file for job {job_id} is no longer available", "It may have been pruned by the retention policy")
+    if raw:
+        return {"job_id": job_id, "filename": report["filename"], "encoding": "base64", "content": base64.b64encode(data).decode("ascii")}
+    return {"job_id": job_id, "filename": report["filename"], "encoding": "utf-8", "content": data.decode("utf-8")}
+
 if __name__ == "__main__":
-    mcp.run(transport="sse")
\ No newline at end of file
+    if MCP_WARMUP:
+        warm_up()
+    mcp.run(transport=MCP_TRANSPORT)
\ No newline at end of file
@@ -0,0 +1,111 @@
+import re
+from typing import Dict, Any, Optional
+
+
+# Local dialing plans: ISO country code -> (calling code, valid national number lengths, valid leading digits).
+# Numbers that can't fit the plan are rejected without calling the verification API.
+PHONE_NUMBER_PLANS = {
+    "IN": ("91", {10}, "23456789"),
+    "US": ("1", {10}, "23456789"),
+    "CA": ("1", {10}, "23456789"),
+    "GB": ("44", {9, 10}, "123578"),
+    "DE": ("49", set(range(6, 14)), "123456789"),
+    "FR": ("33", {9}, "123456789"),
+    "ES": ("34", {9}, "6789"),
+    "IT": ("39", set(range(6, 12)), "0123"),
+    "NL": ("31", {9}, "123456789"),
+    "JP": ("81", {9, 10}, "123456789"),
+    "CN": ("86", {10, 11}, "123456789"),
+    "AU": ("61", {9}, "23478"),
+    "NZ": ("64", set(range(8, 11)), "2345679"),
+    "SG": ("65", {8}, "3689"),
+    "AE": ("971", {8, 9}, "234679"),
+    "BR": ("55", {10, 11}, "123456789"),
+    "MX": ("52", {10}, "123456789"),
+    "ZA": ("27", {9}, "12345678"),
+}
+
+# Common country names so the usual lookups need no restcountries call
+COUNTRY_NAME_CODES = {
+    "india": "IN",
+    "united states": "US", "united states of america": "US", "usa": "US", "us": "US", "america": "US",
+    "canada": "CA",
+    "united kingdom": "GB", "uk": "GB", "great britain": "GB", "england": "GB",
+    "germany": "DE",
+    "france": "FR",
+    "spain": "ES",
+    "italy": "IT",
+    "netherlands": "NL",
+    "japan": "JP",
+    "china": "CN",
+    "australia": "AU",
+    "new zealand": "NZ",
+    "singapore": "SG",
+    "united arab emirates": "AE", "uae": "AE",
+    "brazil": "BR",
+    "mexico": "MX",
+    "south africa": "ZA",
+}
+
+# Bounds for countries without a local plan; E.164 allows at most 15 digits
+MIN_PHONE_DIGITS = 6
+E164_MAX_DIGITS = 15
+
+
+def local_country_code(country: str) -> Optional[str]:
+    """ISO code for a country name or ISO code known locally, else None."""
+    key = country.strip().lower()
+    if key in COUNTRY_NAME_CODES:
+        return COUNTRY_NAME_CODES[key]
+    if key.upper() in PHONE_NUMBER_PLANS:
+        return key.upper()
+    return None
+
+
+def normalize_phone(phone: str, country_code: str) -> Dict[str, Any]:
+    """
+    Parse a phone number locally and normalize it to E.164.
+
+    Returns {"valid": True, "normalized": "+919575787870", ...} or
+    {"valid": False, "reason": "..."} when the number can't exist.
+    """
+    raw = str(phone).strip()
+    if not raw:
+        return {"valid": False, "reason": "Empty phone number"}
+    if re.search(r"[^\d\s\-().+/]", raw):
+        return {"valid": False, "reason": "Phone number contains invalid characters"}
+
+    digits = re.sub(r"\D", "", raw)
+    international = raw.startswith("+") or digits.startswith("00")
+    if digits.startswith("00"):
+        digits = digits[2:]
+
+    plan = PHONE_NUMBER_PLANS.get(country_code)
+    if plan is None:
+        # No local plan for this country: only the generic E.164 bounds apply
+        if not MIN_PHONE_DIGITS <= len(digits) <= E164_MAX_DIGITS:
+            return {"valid": False, "reason": f"Impossible length of {len(digits)} digits"}
+        return {"valid": True, "normalized": f"+{digits}" if international else digits, "local_plan": False}
+
+    calling_code, lengths, leading_digits = plan
+    if international:
+        if not digits.startswith(calling_code):
+            return {"valid": False, "reason": f"Calling code does not match {country_code} (+{calling_code})"}
+        national = digits[len(calling_code):]
+    elif len(digits) - len(calling_code) in lengths and digits.startswith(calling_code):
+        # Calling code written without "+" or "00"
+        national = digits[len(calling_code):]
+    else:
+        national = digits
+
+    # Drop the national trunk prefix (e.g. 07... in the UK), except where 0 is part of the number
+    if national.startswith("0") and "0" not in leading_digits:
+        national = national[1:]
+
+    if len(national) not in lengths:
+        expected = "/".join(str(n) for n in sorted(lengths))
+        return {"valid": False, "reason": f"Impossible length for {country_code}: {len(national)} digits, expected {expected}"}
+    if national[0] not in leading_digits:
+        return {"valid": False, "reason": f"Impossible prefix for {country_code}: numbers cannot start with {national[0]}"}
+
+    return {"valid": True, "normalized": f"+{calling_code}{national}", "local_plan": True}
@@ -0,0 +1,201 @@
+import os
+import sys
+import gzip
+import json
+import time
+import uuid
+import hashlib
+import datetime
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Optional
+
+from shared_cache import SharedCache
+
+
+# Environment variables
+REPORTS_DIR = os.getenv("REPORTS_DIR", "reports")
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_MAX_PENDING = int(os.getenv("REPORT_MAX_PENDING", "32"))
+REPORT_RETENTION_SECONDS = int(os.getenv("REPORT_RETENTION_SECONDS", "604800"))
+REPORT_MAX_FILES = int(os.getenv("REPORT_MAX_FILES", "500"))
+
+
+def reports_dir() -> str:
+    """Absolute reports directory, created on first use."""
+    path = os.path.abspath(os.path.expanduser(REPORTS_DIR))
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def content_hash(title: str, content: Dict[str, Any], format: str, compress: bool) -> str:
+    """Hash of everything that determines a report, so identical requests render once."""
+    payload = json.dumps([title, content, format, compress], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def write_report_file(full_filename: str, report_text: str, compress: bool = False) -> Dict[str, Any]:
+    """Write a rendered report, gzip-compressed when asked; returns its name, path and size."""
+    if compress:
+        full_filename += ".gz"
+    file_path = os.path.join(reports_dir(), full_filename)
+    data = report_text.encode("utf-8")
+    if compress:
+        data = gzip.compress(data)
+    with open(file_path, "wb") as f:
+        f.write(data)
+    return {"filename": full_filename, "absolute_path": file_path, "size_bytes": len(data)}
+
+
+def read_report_file(file_path: str, decompress: bool = True) -> bytes:
+    with open(file_path, "rb") as f:
+        data = f.read()
+    if decompress and file_path.endswith(".gz"):
+        data = gzip.decompress(data)
+    return data
+
+
+def prune_reports() -> int:
+    """Delete reports older than the retention period, then the oldest beyond REPORT_MAX_FILES."""
+    now = time.time()
+    removed = 0
+    try:
+        entries = [entry for entry in os.scandir(reports_dir()) if entry.is_file()]
+    except OSError as e:
+        print(f"Error listing reports: {e}", file=sys.stderr)
+        return 0
+    entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for index, entry in enumerate(entries):
+        expired = REPORT_RETENTION_SECONDS > 0 and now - entry.stat().st_mtime > REPORT_RETENTION_SECONDS
+        over_limit = REPORT_MAX_FILES > 0 and index >= REPORT_MAX_FILES
+        if expired or over_limit:
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except OSError as e:
+                print(f"Error removing report {entry.path}: {e}", file=sys.stderr)
+    return removed
+
+
+def _reusable(path: str) -> bool:
+    """True if a rendered report exists and is still within the retention period."""
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return False
+    return REPORT_RETENTION_SECONDS <= 0 or age <= REPORT_RETENTION_SECONDS
+
+
+class ReportJobs:
+    """
+    Renders reports on a bounded worker pool.
+
+    Job records are kept in memory and mirrored to the shared cache, so a
+    replica can answer status calls for jobs another replica accepted when
+    both share the cache and the reports directory. Finished records are
+    evicted under the same retention limits as the report files.
+    """
+
+    def __init__(self, workers: int = REPORT_WORKERS, max_pending: int = REPORT_MAX_PENDING):
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._submitted_at: Dict[str, float] = {}
+        # In-flight jobs only, so duplicates can join them and pending() stays cheap
+        self._by_hash: Dict[str, str] = {}
+        self._shared = SharedCache("report_job", REPORT_RETENTION_SECONDS)
+
+    def _save(self, job: Dict[str, Any]):
+        with self._lock:
+            self._submitted_at.setdefault(job["job_id"], time.time())
+            self._jobs[job["job_id"]] = job
+        self._shared.set(job["job_id"], job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            job = self._shared.get(job_id)
+        return dict(job) if job is not None else None
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._by_hash)
+
+    def evict(self) -> int:
+        """Drop finished job records older than the retention period, then the oldest beyond REPORT_MAX_FILES."""
+        cutoff = time.time() - REPORT_RETENTION_SECONDS
+        removed = 0
+        with self._lock:
+            # Records are inserted in submission order, so the oldest come first
+            finished = [job_id for job_id, job in self._jobs.items() if job["status"] in ("done", "failed")]
+            excess = len(finished) - REPORT_MAX_FILES if REPORT_MAX_FILES > 0 else 0
+            for index, job_id in enumerate(finished):
+                expired = REPORT_RETENTION_SECONDS > 0 and self._submitted_at[job_id] < cutoff
+                if expired or index < excess:
+                    del self._jobs[job_id]
+                    del self._submitted_at[job_id]
+                    removed += 1
+        return removed
+
+    def _new_job(self, report_hash: str, status: str) -> Dict[str, Any]:
+        return {
+            "job_id": uuid.uuid4().hex,
+            "status": status,
+            "content_hash": report_hash,
+            "created_at": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def submit(self, report_hash: str, existing_path: Optional[str], render: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Queue `render` unless an identical report is already rendered
+        (`existing_path` exists) or in flight, in which case that result is reused.
+        """
+        self.evict()
+        with self._lock:
+            in_flight = self._by_hash.get(report_hash)
+            if in_flight:
+                return dict(self._jobs[in_flight], deduplicated=True)
+
+        if existing_path and _reusable(existing_path):
+            # Touch the file so the retention policy counts it as freshly rendered
+            os.utime(existing_path)
+            job = self._new_job(report_hash, "done")
+            job["deduplicated"] = True
+            job["report"] = {
+                "filename": os.path.basename(existing_path),
+                "absolute_path": existing_path,
+                "size_bytes": os.path.getsize(existing_path),
+            }
+            self._save(job)
+            return job
+
+        if self.pending() >= self.max_pending:
+            return {"error": f"Too many report jobs in progress ({self.max_pending}), try again shortly"}
+
+        job = self._new_job(report_hash, "queued")
+        self._save(job)
+        with self._lock:
+            self._by_hash[report_hash] = job["job_id"]
+        # Copy the context so the render span joins the trace of the submitting tool call
+        self._pool.submit(contextvars.copy_context().run, self._run, job["job_id"], render)
+        return job
+
+    def _run(self, job_id: str, render: Callable[[], Dict[str, Any]]):
+        job = self.get(job_id)
+        job["status"] = "running"
+        self._save(job)
+        try:
+            report = render()
+            if "error" in report:
+                job.update(status="failed", error=report["error"])
+            else:
+                job.update(status="done", report=report)
+        except Exception as e:
+            job.update(status="failed", error=str(e))
+        job["finished_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._save(job)
+        with self._lock:
+            self._by_hash.pop(job["content_hash"], None)
@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import itertools
+import threading
+from typing import Any, Optional
+
+from telemetry import metrics
+
+
+# Environment variables
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite")  # sqlite or none
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "cache/mcp_cache.sqlite3")
+CACHE_PURGE_INTERVAL = int(os.getenv("CACHE_PURGE_INTERVAL", "500"))  # writes between purges of expired rows; 0 disables
+
+_local = threading.local()
+_writes = itertools.count(1)
+
+
+def _connection() -> sqlite3.Connection:
+    """
+    One SQLite connection per thread, in WAL mode.
+
+    WAL lets every replica read while one writes, so server processes on
+    the same host can share a single cache file.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        db_dir = os.path.dirname(CACHE_DB_PATH)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        conn = sqlite3.connect(CACHE_DB_PATH, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits (name TEXT NOT NULL, window_start REAL NOT NULL, "
+            "count INTEGER NOT NULL, PRIMARY KEY (name, window_start))"
+        )
+        _local.conn = conn
+        purge_expired()
+    return conn
+
+
+def purge_expired() -> int:
+    """Delete expired cache rows; `get` skips them, but they would otherwise stay in the file forever."""
+    try:
+        return _connection().execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+    except sqlite3.Error as e:
+        print(f"Error purging cache: {e}", file=sys.stderr)
+        return 0
+
+
+class SharedCache:
+    """A TTL cache for JSON-serializable values, shared by all processes using CACHE_DB_PATH."""
+
+    def __init__(self, namespace: str, ttl: float):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.enabled = CACHE_BACKEND == "sqlite" and ttl > 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        try:
+            row = _connection().execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (self._key(key), time.time())
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading cache: {e}", file=sys.stderr)
+            row = None
+        metrics.record_cache(self.namespace, row is not None)
+        return json.loads(row[0]) if row is not None else None
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        try:
+            _connection().execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (self._key(key), json.dumps(value), time.time() + self.ttl),
+            )
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Error writing cache: {e}", file=sys.stderr)
+        if CACHE_PURGE_INTERVAL > 0 and next(_writes) % CACHE_PURGE_INTERVAL == 0:
+            purge_expired()
+
+
+class RateLimiter:
+    """
+    Fixed-window rate limit shared across processes, e.g. 5 calls per 60 seconds.
+
+    A limit of 0 disables it.
+    """
+
+    def __init__(self, name: str, limit: int, period: float):
+        self.name = name
+        self.limit = limit
+        self.period = period
+
+    def try_acquire(self) -> bool:
+        if self.limit <= 0 or CACHE_BACKEND != "sqlite":
+            return True
+        window_start = time.time() // self.period * self.period
+        conn = _connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT count FROM rate_limits WHERE name = ? AND window_start = ?", (self.name, window_start)
+            ).fetchone()
+            count = row[0] if row else 0
+            allowed = count < self.limit
+            if allowed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_limits (name, window_start, count) VALUES (?, ?, ?)",
+                    (self.name, window_start, count + 1),
+                )
+                conn.execute("DELETE FROM rate_limits WHERE name = ? AND window_start < ?", (self.name, window_start))
+            conn.execute("COMMIT")
+            return allowed
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"Error updating rate limit: {e}", file=sys.stderr)
+            return True
+
+    def retry_after(self) -> float:
+        """Seconds until the current window ends and slots free up again."""
+        return self.period - time.time() % self.period
+
+
+def parse_rate_limit(value: str) -> tuple:
+    """Parse "calls/seconds" (e.g. "5/60") into (calls, seconds); empty means unlimited."""
+    if not value:
+        return 0, 1.0
+    calls, _, period = value.partition("/")
+    return int(calls), float(period or 1)
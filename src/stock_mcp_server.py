@@ -1,13 +1,17 @@
 import os
-import platform
+import sys
+import time
+import asyncio
 import requests
-import re
-import json
-import datetime
-import random
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
+from telemetry import traced_tool, traced_get, register_metrics_route
+from shared_cache import SharedCache, RateLimiter, parse_rate_limit
+from token_accounting import budgeted_response, count_tokens
+from phone_numbers import local_country_code, normalize_phone
 
 
 # Load environment variables
@@ -21,6 +25,25 @@ ALPHAVANTAGE_BASE_URL = os.getenv("ALPHAVANTAGE_BASE_URL")
 ALPHAVANTAGE_API_KEY = os.getenv("ALPHAVANTAGE_API_KEY")
 MCP_SERVER_PORT = os.getenv("STOCK_MCP_SERVER_PORT", "8001")
 MCP_SERVER_URL = f"http://localhost:{MCP_SERVER_PORT}"
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "sse")  # sse, streamable-http or stdio
+MCP_STATELESS_HTTP = os.getenv("MCP_STATELESS_HTTP", "true").lower() in ("1", "true", "yes")
+MCP_WARMUP = os.getenv("MCP_WARMUP", "false").lower() in ("1", "true", "yes")
+STOCK_CACHE_TTL = int(os.getenv("STOCK_CACHE_TTL", "60"))
+COUNTRY_CACHE_TTL = int(os.getenv("COUNTRY_CACHE_TTL", "86400"))
+PHONE_CACHE_TTL = int(os.getenv("PHONE_CACHE_TTL", "86400"))
+ALPHAVANTAGE_RATE_LIMIT = os.getenv("ALPHAVANTAGE_RATE_LIMIT", "")
+PHONE_VERIFY_RATE_LIMIT = os.getenv("PHONE_VERIFY_RATE_LIMIT", "")
+PHONE_VERIFY_CONCURRENCY = int(os.getenv("PHONE_VERIFY_CONCURRENCY", "4"))
+PHONE_BATCH_MAX = int(os.getenv("PHONE_BATCH_MAX", "100"))
+PHONE_VERIFY_MAX_WAIT = float(os.getenv("PHONE_VERIFY_MAX_WAIT", "120"))  # seconds a batch waits for rate-limit slots
+
+# Caches and rate limits live in the shared backend so replicas don't duplicate upstream calls
+stock_cache = SharedCache("stock", STOCK_CACHE_TTL)
+country_cache = SharedCache("country", COUNTRY_CACHE_TTL)
+phone_cache = SharedCache("phone", PHONE_CACHE_TTL)
+alphavantage_limiter = RateLimiter("alphavantage", *parse_rate_limit(ALPHAVANTAGE_RATE_LIMIT))
+phone_verify_limiter = RateLimiter("phone_verify", *parse_rate_limit(PHONE_VERIFY_RATE_LIMIT))
+phone_verify_pool = ThreadPoolExecutor(max_workers=PHONE_VERIFY_CONCURRENCY, thread_name_prefix="phone-verify")
 
 
 mcp = FastMCP(
@@ -29,14 +52,21 @@ mcp = FastMCP(
     debug=False,
     log_level="INFO",
     host="0.0.0.0",
-    port=int(MCP_SERVER_PORT) 
+    port=int(MCP_SERVER_PORT),
+    # Stateless streamable HTTP keeps no per-client session, so any replica can answer any call
+    stateless_http=MCP_STATELESS_HTTP,
+    json_response=MCP_STATELESS_HTTP
 )
+register_metrics_route(mcp)
 
 
 def get_country_info_custom(country_name):
+    cached = country_cache.get(country_name.lower())
+    if cached is not None:
+        return cached
     url = COUNTRY_BASE_URL + country_name
     try:
-        response = requests.get(url)
+        response = traced_get(url)
         response.raise_for_status()  # Raises an HTTPError for bad responses
         data = response.json()
         # Extract first result
@@ -48,7 +78,7 @@ def get_country_info_custom(country_name):
         currency_name = currencies[currency_code]["name"] if currencies else "N/A"
         currency_symbol = currencies[currency_code]["symbol"] if currencies else "N/A"
         
-        return {
+        country_info = {
             "name": country["name"]["common"],
             "capital": country["capital"][0] if country.get("capital") else "N/A",
             "region": country.get("region", "N/A"),
@@ -58,47 +88,133 @@ def get_country_info_custom(country_name):
             "currency_symbol": currency_symbol,
             "population": country.get("population", "N/A")
         }
+        country_cache.set(country_name.lower(), country_info)
+        return country_info
     except requests.exceptions.RequestException as e:
         return f"Error: {str(e)}"
     except (IndexError, KeyError, TypeError):
         return "Error: Country data not found or malformed response"
 
 
-# Custom Function 1
-@mcp.tool()
-def validate_phone_number(phone: str, country: str):
+def warm_up():
+    """Open the shared cache, load the tokenizer and start the verification workers ahead of the first tool call (MCP_WARMUP)."""
+    phone_cache.get("warm-up")
+    count_tokens("warm-up")
+    phone_verify_pool.submit(lambda: None).result()
+
 
+def resolve_phone_country(country: str) -> Dict[str, Any]:
+    """ISO country code for the phone tools, looked up locally before asking restcountries."""
+    country_code = local_country_code(country)
+    if country_code:
+        return {"country_code": country_code}
     country_info = get_country_info_custom(country)
     if isinstance(country_info, str):  # Check if an error message was returned
-       return
-    country_code = country_info["country_code"]
+        return {"error": f"Could not resolve country '{country}': {country_info}"}
+    return {"country_code": country_info["country_code"]}
+
+
+def cached_phone_verification(normalized: str, country_code: str) -> Optional[Dict[str, Any]]:
+    cached = phone_cache.get(f"{country_code}:{normalized}")
+    return {"source": "cache", "result": cached} if cached is not None else None
+
+
+def verify_phone_upstream(normalized: str, country_code: str) -> Dict[str, Any]:
+    """Verify one normalized number with the phone-verification API, through the shared cache."""
+    cached = cached_phone_verification(normalized, country_code)
+    if cached is not None:
+        return cached
+    if not phone_verify_limiter.try_acquire():
+        return {"error": f"Phone verification rate limit exceeded, retry in {phone_verify_limiter.retry_after():.0f}s"}
+    return request_phone_verification(normalized, country_code)
+
+
+async def verify_phone_queued(normalized: str, country_code: str, deadline: float) -> Dict[str, Any]:
+    """
+    Like `verify_phone_upstream`, but waits for a rate-limit slot until `deadline`
+    (a `time.monotonic()` value) without blocking the event loop.
+    """
+    cached = cached_phone_verification(normalized, country_code)
+    if cached is not None:
+        return cached
+    while not phone_verify_limiter.try_acquire():
+        wait = phone_verify_limiter.retry_after()
+        if time.monotonic() + wait > deadline:
+            return {"error": f"Phone verification rate limit exceeded, not verified within {PHONE_VERIFY_MAX_WAIT:.0f}s"}
+        await asyncio.sleep(wait)
+    # Copy the context so upstream spans stay children of this tool call
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        phone_verify_pool, contextvars.copy_context().run, request_phone_verification, normalized, country_code
+    )
+
+
+def request_phone_verification(normalized: str, country_code: str) -> Dict[str, Any]:
+    """Call the phone-verification API for one number and cache the answer."""
+    cache_key = f"{country_code}:{normalized}"
     # API endpoint and parameters
     url = PHONE_VERIFY_BASE_URL
     params = {
         "api_key": PHONE_VERIFY_KEY,
-        "phone": phone,
+        "phone": normalized.lstrip("+"),
         "country": country_code
     }
     
     try:
         # Make the GET request
-        response = requests.get(url, params=params)
+        response = traced_get(url, params=params)
         
         # Check if the request was successful
         if response.status_code == 200:
             # Print the response text
-            print("API Response:", response.text)
-            return response.json()
+            print("API Response:", response.text, file=sys.stderr)
+            data = response.json()
+            phone_cache.set(cache_key, data)
+            return {"source": "api", "result": data}
         else:
-            print(f"Error: Received status code {response.status_code}")
+            print(f"Error: Received status code {response.status_code}", file=sys.stderr)
+            return {"error": f"Phone verification API returned status {response.status_code}"}
             
-    except requests.RequestException as e:
-        print(f"Error making request: {e}")
+    except (requests.RequestException, ValueError) as e:
+        print(f"Error making request: {e}", file=sys.stderr)
+        return {"error": f"Request failed: {str(e)}"}
+
+
+# Custom Function 1
+@mcp.tool()
+@traced_tool
+@budgeted_response
+def validate_phone_number(phone: str, country: str):
+
+    country_result = resolve_phone_country(country)
+    if "error" in country_result:
+        return country_result
+    country_code = country_result["country_code"]
+
+    # Reject numbers that can't exist before spending an API call on them
+    parsed = normalize_phone(phone, country_code)
+    if not parsed["valid"]:
+        return {"error": f"Invalid phone number: {parsed['reason']}", "phone": phone, "country_code": country_code}
+
+    verification = verify_phone_upstream(parsed["normalized"], country_code)
+    if "error" in verification:
+        return verification
+    return verification["result"]
 
 # Custom Function 2
 @mcp.tool()
+@traced_tool
+@budgeted_response
 def get_stock_data(symbol, interval="5min", function="TIME_SERIES_INTRADAY"):
    
+    cache_key = f"{function}:{symbol}:{interval}"
+    cached = stock_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    # Fail fast: sync tools run on the server's event loop, so waiting here would stall every session
+    if not alphavantage_limiter.try_acquire():
+        return {"error": f"Rate limit exceeded for AlphaVantage, retry in {alphavantage_limiter.retry_after():.0f}s"}
+
     url = ALPHAVANTAGE_BASE_URL
     params = {
         "apikey": ALPHAVANTAGE_API_KEY,
@@ -107,7 +223,7 @@ def get_stock_data(symbol, interval="5min", function="TIME_SERIES_INTRADAY"):
         "function": function
     }
     try:
-        res = requests.get(url, params=params)
+        res = traced_get(url, params=params)
         res.raise_for_status()  
         data = res.json()
         if "Error Message" in data:
@@ -115,11 +231,88 @@ def get_stock_data(symbol, interval="5min", function="TIME_SERIES_INTRADAY"):
         elif "Information" in data:
             return {"info": data["Information"]}  
         else:
+            stock_cache.set(cache_key, data)
             return data
             
     except requests.exceptions.RequestException as e:
         return {"error": f"Request failed: {str(e)}"}       
+
+# Custom Function 3
+@mcp.tool()
+@traced_tool
+@budgeted_response
+async def validate_phone_numbers(phones: List[str], country: str) -> Dict[str, Any]:
+    """
+    Validate a batch of phone numbers from one country.
+    
+    Numbers are parsed and normalized locally first, and impossible ones are
+    rejected without an API call. Duplicates are verified once, previously
+    verified numbers come from the cache, and the rest are verified
+    concurrently under the phone-verification rate limit, waiting for free
+    slots for up to PHONE_VERIFY_MAX_WAIT seconds.
+    
+    Args:
+        phones: Phone numbers, in national or international format
+        country: Country name or ISO code the numbers belong to
+    
+    Returns:
+        A summary and one result per input number, in input order
+    """
+    if len(phones) > PHONE_BATCH_MAX:
+        return {"error": f"Too many phone numbers: {len(phones)}, the limit is {PHONE_BATCH_MAX}"}
+
+    # Blocking lookups run off the event loop so other sessions keep being served
+    country_result = await asyncio.to_thread(resolve_phone_country, country)
+    if "error" in country_result:
+        return country_result
+    country_code = country_result["country_code"]
+
+    # Parse locally and dedupe on the normalized form
+    parsed_inputs = [normalize_phone(phone, country_code) for phone in phones]
+    to_verify = sorted({parsed["normalized"] for parsed in parsed_inputs if parsed["valid"]})
+
+    # Numbers beyond the rate limit wait for the next window, up to PHONE_VERIFY_MAX_WAIT
+    deadline = time.monotonic() + PHONE_VERIFY_MAX_WAIT
+    verified = await asyncio.gather(*(verify_phone_queued(normalized, country_code, deadline) for normalized in to_verify))
+    verifications = dict(zip(to_verify, verified))
+
+    results = []
+    for phone, parsed in zip(phones, parsed_inputs):
+        if not parsed["valid"]:
+            results.append({"phone": phone, "status": "rejected", "source": "local", "reason": parsed["reason"]})
+            continue
+        verification = verifications[parsed["normalized"]]
+        if "error" in verification:
+            results.append({"phone": phone, "normalized": parsed["normalized"], "status": "error", "reason": verification["error"]})
+            continue
+        result = verification["result"]
+        valid = result.get("valid") if isinstance(result, dict) else None
+        results.append({
+            "phone": phone,
+            "normalized": parsed["normalized"],
+            "status": "valid" if valid else "invalid",
+            "source": verification["source"],
+            "result": result
+        })
+
+    statuses = [r["status"] for r in results]
+    return {
+        "country_code": country_code,
+        "summary": {
+            "total": len(phones),
+            "unique_verified": len(to_verify),
+            "rejected_locally": statuses.count("rejected"),
+            "from_cache": sum(1 for v in verifications.values() if v.get("source") == "cache"),
+            "from_api": sum(1 for v in verifications.values() if v.get("source") == "api"),
+            "valid": statuses.count("valid"),
+            "invalid": statuses.count("invalid"),
+            "errors": statuses.count("error")
+        },
+        "results": results
+    }
   
     
 if __name__ == "__main__":
-    mcp.run(transport="sse")
\ No newline at end of file
+    if MCP_WARMUP:
+        warm_up()
+    mcp.run(transport=MCP_TRANSPORT)
\ No newline at end of file
@@ -1,9 +1,13 @@
 import asyncio
 import streamlit as st
 from pydantic_ai import Agent
-from pydantic_ai.mcp import MCPServerHTTP
 import os
+from contextlib import AsyncExitStack
 from datetime import datetime
+from telemetry import span, trace_headers
+from mcp_transports import mcp_server_url, build_mcp_server
+from model_backends import REPLAY_PROVIDER, REPLAY_MODELS, REPLAY_TRANSCRIPTS, resolve_model, record_transcript
+from token_accounting import usage_summary, format_usage
 
 
 # Environment variables
@@ -12,11 +16,11 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 # Environment variables with Docker service names
 STOCK_MCP_SERVER_PORT = os.getenv("STOCK_MCP_SERVER_PORT", "8001")
 STOCK_MCP_SERVER_HOST = os.getenv("STOCK_MCP_SERVER_HOST", "stock-mcp-server")  
-STOCK_MCP_SERVER_URL = f"http://{STOCK_MCP_SERVER_HOST}:{STOCK_MCP_SERVER_PORT}/sse"
+STOCK_MCP_SERVER_URL = mcp_server_url(STOCK_MCP_SERVER_HOST, STOCK_MCP_SERVER_PORT)
 
 NEWS_MCP_SERVER_PORT = os.getenv("NEWS_MCP_SERVER_PORT", "8001")
 NEWS_MCP_SERVER_HOST = os.getenv("NEWS_MCP_SERVER_HOST", "stock-mcp-server")  
-NEWS_MCP_SERVER_URL = f"http://{NEWS_MCP_SERVER_HOST}:{NEWS_MCP_SERVER_PORT}/sse"
+NEWS_MCP_SERVER_URL = mcp_server_url(NEWS_MCP_SERVER_HOST, NEWS_MCP_SERVER_PORT)
 
 
 # Model lists
@@ -35,13 +39,21 @@ OPENAI_MODELS = [
     "gpt-3.5-turbo"
 ]
 
-# Configure MCP servers and agent
+MODELS_BY_PROVIDER = {"anthropic": ANTHROPIC_MODELS, "openai": OPENAI_MODELS}
+# The replay backend is offered when a transcript file is available
+if os.path.exists(REPLAY_TRANSCRIPTS):
+    MODELS_BY_PROVIDER[REPLAY_PROVIDER] = REPLAY_MODELS
+
+# Configure the model; it is shared across sessions
 @st.cache_resource
-def setup_agent(llm_provider: str, model: str):
-    server_1 = MCPServerHTTP(url=STOCK_MCP_SERVER_URL)
-    server_2 = MCPServerHTTP(url=NEWS_MCP_SERVER_URL)
-    agent_id = f"{llm_provider}:{model}"
-    return Agent(agent_id, mcp_servers=[server_1, server_2])
+def load_model(llm_provider: str, model: str):
+    return resolve_model(llm_provider, model)
+
+# Configure MCP servers and agent per query, so concurrent queries never share their headers
+def setup_agent(llm_provider: str, model: str, headers=None):
+    server_1 = build_mcp_server(STOCK_MCP_SERVER_URL, "stock_mcp_server.py", headers=headers)
+    server_2 = build_mcp_server(NEWS_MCP_SERVER_URL, "news_mcp_server.py", headers=headers)
+    return Agent(load_model(llm_provider, model), mcp_servers=[server_1, server_2])
 
 # Sidebar for LLM and model selection
 with st.sidebar:
@@ -50,12 +62,12 @@ with st.sidebar:
     # LLM Provider selection
     llm_provider = st.selectbox(
         "Select LLM Provider",
-        options=["anthropic", "openai"],
+        options=list(MODELS_BY_PROVIDER),
         index=0
     )
     
     # Model selection based on provider
-    models = ANTHROPIC_MODELS if llm_provider == "anthropic" else OPENAI_MODELS
+    models = MODELS_BY_PROVIDER[llm_provider]
     selected_model = st.selectbox(
         "Select Model",
         options=models,
@@ -66,7 +78,6 @@ with st.sidebar:
     st.write(f"Current Agent: `{llm_provider}:{selected_model}`")
     api_key_input = f"{llm_provider.upper()}_API_KEY"
 
-agent = setup_agent(llm_provider, selected_model)
 
 # Main UI
 st.title("MCP - Streamlit Chatbot")
@@ -84,22 +95,36 @@ for message in st.session_state.messages:
         if "reasoning" in message and message["reasoning"]:
             with st.expander("Reasoning"):
                 st.write(message["reasoning"])
+        if message.get("usage"):
+            st.caption(format_usage(message["usage"]))
 
 # Async function to process query
 async def process_query(query: str):
-    try:
-        async with agent.run_mcp_servers():
-            result = await agent.run(query)
-            response = str(result.data)  
-            reasoning = "Reasoning not available" 
-            # If result has a reasoning attribute, uncomment and adjust:
-            # reasoning = getattr(result, "reasoning", "Reasoning not available")
-        return response, reasoning
-    except Exception as e:
-        import traceback
-        error_details = f"Error: {str(e)}\n{traceback.format_exc()}"
-        print(error_details)
-        return f"An error occurred: {str(e)}", "Error occurred during processing"
+    with span("process_query", frontend="streamlit", llm_provider=llm_provider, model=selected_model) as root:
+        try:
+            # The trace context travels in this query's own MCP connection headers
+            agent = setup_agent(llm_provider, selected_model, trace_headers())
+            async with AsyncExitStack() as stack:
+                with span("mcp.connect"):
+                    await stack.enter_async_context(agent.run_mcp_servers())
+                with span("agent.run"):
+                    result = await agent.run(query)
+                if llm_provider != REPLAY_PROVIDER:
+                    record_transcript(query, result.all_messages())
+                response = str(result.data)  
+                reasoning = "Reasoning not available" 
+                # If result has a reasoning attribute, uncomment and adjust:
+                # reasoning = getattr(result, "reasoning", "Reasoning not available")
+                usage = usage_summary(result)
+                root.set_attribute("input_tokens", usage["input_tokens"])
+                root.set_attribute("output_tokens", usage["output_tokens"])
+            return response, reasoning, usage
+        except Exception as e:
+            import traceback
+            error_details = f"Error: {str(e)}\n{traceback.format_exc()}"
+            print(error_details)
+            root.set_error(e)
+            return f"An error occurred: {str(e)}", "Error occurred during processing", None
 
 # Chat input
 prompt = st.chat_input("Ask something:")
@@ -119,13 +144,14 @@ if prompt:
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            response, reasoning = loop.run_until_complete(process_query(prompt))
+            response, reasoning, usage = loop.run_until_complete(process_query(prompt))
             
             assistant_timestamp = datetime.now().strftime("%H:%M:%S")
             st.session_state.messages.append({
                 "role": "assistant",
                 "content": response,
                 "reasoning": reasoning,
+                "usage": usage,
                 "timestamp": assistant_timestamp
             })
             
@@ -135,6 +161,8 @@ if prompt:
                 if reasoning and reasoning != "Reasoning not available":
                     with st.expander("Reasoning"):
                         st.write(reasoning)
+                if usage:
+                    st.caption(format_usage(usage))
         except Exception as e:
             st.error(f"Error: {str(e)}")
         finally:
@@ -0,0 +1,338 @@
+import os
+import sys
+import json
+import time
+import uuid
+import inspect
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from typing import Dict, List, Any, Optional
+
+
+# Environment variables
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "mcp-multiagent-demo")
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() in ("1", "true", "yes")
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "traces/spans.jsonl")
+TRACEPARENT_HEADER = "traceparent"
+
+# Histogram buckets in seconds, covering local tools up to slow LLM turns
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Tool response sizes, from a short status line up to a full upstream payload
+BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+TOKEN_BUCKETS = (64, 256, 1000, 2000, 4000, 8000, 16000, 64000)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+# Tracing
+
+class Span:
+    """A single timed operation, exported as one JSON line when it ends."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.status = "ok"
+        self.start_time = time.time()
+        self._start = time.perf_counter()
+        self.duration = 0.0
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: Any):
+        self.status = "error"
+        self.attributes["error"] = str(error)
+
+    @property
+    def traceparent(self) -> str:
+        """W3C trace context header value pointing at this span."""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def end(self):
+        self.duration = time.perf_counter() - self._start
+        _export_span(self)
+
+
+def _export_span(span: Span):
+    """Append a finished span to the local JSONL exporter file."""
+    if not TRACING_ENABLED:
+        return
+    record = {
+        "service": SERVICE_NAME,
+        "name": span.name,
+        "trace_id": span.trace_id,
+        "span_id": span.span_id,
+        "parent_span_id": span.parent_id,
+        "start_time": span.start_time,
+        "duration_ms": round(span.duration * 1000, 3),
+        "status": span.status,
+        "attributes": span.attributes,
+    }
+    try:
+        export_dir = os.path.dirname(TRACE_EXPORT_PATH)
+        if export_dir:
+            os.makedirs(export_dir, exist_ok=True)
+        with _export_lock:
+            with open(TRACE_EXPORT_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+    except OSError as e:
+        print(f"Error exporting span: {e}", file=sys.stderr)
+
+
+def parse_traceparent(value: Optional[str]):
+    """Return (trace_id, parent_span_id) from a traceparent header, or None."""
+    if not value:
+        return None
+    parts = value.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+@contextmanager
+def span(name: str, traceparent: Optional[str] = None, **attributes):
+    """
+    Open a span as a child of the current span.
+
+    If there is no current span, `traceparent` (from an incoming request)
+    is used as the remote parent; otherwise a new trace is started.
+    """
+    parent = _current_span.get()
+    if parent is not None:
+        trace_id, parent_id = parent.trace_id, parent.span_id
+    else:
+        remote = parse_traceparent(traceparent)
+        trace_id, parent_id = remote if remote else (uuid.uuid4().hex, None)
+
+    current = Span(name, trace_id, parent_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.set_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_traceparent() -> Optional[str]:
+    """traceparent header for the current span, if any."""
+    current = _current_span.get()
+    return current.traceparent if current is not None else None
+
+
+def trace_headers() -> Dict[str, str]:
+    """Headers carrying the current trace context on an outgoing connection."""
+    traceparent = current_traceparent()
+    return {TRACEPARENT_HEADER: traceparent} if traceparent else {}
+
+
+def _incoming_traceparent() -> Optional[str]:
+    """Read the traceparent header of the MCP request being handled, if any."""
+    try:
+        from mcp.server.lowlevel.server import request_ctx
+        request = getattr(request_ctx.get(), "request", None)
+    except (ImportError, LookupError):
+        return None
+    headers = getattr(request, "headers", None)
+    return headers.get(TRACEPARENT_HEADER) if headers is not None else None
+
+
+def _is_error_result(result: Any) -> bool:
+    """Tools report failures as values, so look for the error conventions used here."""
+    if isinstance(result, dict):
+        return "error" in result
+    if isinstance(result, str):
+        return result.startswith("Error")
+    return False
+
+
+def traced_tool(func):
+    """
+    Wrap an MCP tool in a span and record its latency and errors.
+
+    Apply it below `@mcp.tool()` so FastMCP still sees the original signature.
+    Coroutine tools get an async wrapper, so FastMCP still awaits them.
+    """
+    tool_name = func.__name__
+
+    def finish(current: Span, start: float, error: bool, result: Any = None):
+        if not error and _is_error_result(result):
+            error = True
+            current.status = "error"
+        metrics.observe_tool(tool_name, time.perf_counter() - start, error)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            with span(f"tool {tool_name}", traceparent=_incoming_traceparent(), tool=tool_name) as current:
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    finish(current, start, True)
+                    raise
+                finish(current, start, False, result)
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        with span(f"tool {tool_name}", traceparent=_incoming_traceparent(), tool=tool_name) as current:
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                finish(current, start, True)
+                raise
+            finish(current, start, False, result)
+        return result
+
+    return wrapper
+
+
+def traced_get(url: str, params: Optional[Dict[str, Any]] = None, **kwargs) -> Any:
+    """`requests.get` with an upstream span and latency metrics; query strings are not recorded."""
+    # Imported here so the chat apps can use this module without requests installed
+    import requests
+    parsed = urlparse(url)
+    host = parsed.netloc or "unknown"
+    start = time.perf_counter()
+    with span(f"GET {host}", http_method="GET", http_url=f"{parsed.scheme}://{host}{parsed.path}") as current:
+        try:
+            response = requests.get(url, params=params, **kwargs)
+        except requests.exceptions.RequestException as e:
+            metrics.observe_upstream(host, time.perf_counter() - start, True)
+            current.set_error(e)
+            raise
+        current.set_attribute("http_status_code", response.status_code)
+        failed = response.status_code >= 400
+        if failed:
+            current.status = "error"
+        metrics.observe_upstream(host, time.perf_counter() - start, failed)
+        return response
+
+
+# Metrics
+
+class _Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Metrics:
+    """In-process metric registry rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tool_latency: Dict[str, _Histogram] = {}
+        self.tool_calls: Dict[str, int] = {}
+        self.tool_errors: Dict[str, int] = {}
+        self.upstream_latency: Dict[str, _Histogram] = {}
+        self.upstream_errors: Dict[str, int] = {}
+        self.cache_lookups: Dict[tuple, int] = {}
+        self.response_bytes: Dict[str, _Histogram] = {}
+        self.response_tokens: Dict[str, _Histogram] = {}
+        self.truncated: Dict[str, int] = {}
+
+    def observe_tool(self, tool: str, seconds: float, error: bool = False):
+        with self._lock:
+            self.tool_latency.setdefault(tool, _Histogram()).observe(seconds)
+            self.tool_calls[tool] = self.tool_calls.get(tool, 0) + 1
+            self.tool_errors[tool] = self.tool_errors.get(tool, 0) + (1 if error else 0)
+
+    def observe_upstream(self, host: str, seconds: float, error: bool = False):
+        with self._lock:
+            self.upstream_latency.setdefault(host, _Histogram()).observe(seconds)
+            self.upstream_errors[host] = self.upstream_errors.get(host, 0) + (1 if error else 0)
+
+    def observe_response(self, tool: str, size_bytes: int, tokens: int, returned_tokens: int):
+        with self._lock:
+            self.response_bytes.setdefault(tool, _Histogram(BYTE_BUCKETS)).observe(size_bytes)
+            self.response_tokens.setdefault(tool, _Histogram(TOKEN_BUCKETS)).observe(tokens)
+            self.truncated[tool] = self.truncated.get(tool, 0) + (1 if returned_tokens < tokens else 0)
+
+    def record_cache(self, cache: str, hit: bool):
+        key = (cache, "hit" if hit else "miss")
+        with self._lock:
+            self.cache_lookups[key] = self.cache_lookups.get(key, 0) + 1
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines += _render_histogram("mcp_tool_duration_seconds", "Latency of MCP tool calls.", "tool", self.tool_latency)
+            lines += _render_counter("mcp_tool_calls_total", "MCP tool calls.", {("tool", k): v for k, v in self.tool_calls.items()})
+            lines += _render_counter("mcp_tool_errors_total", "MCP tool calls that failed or returned an error.", {("tool", k): v for k, v in self.tool_errors.items()})
+            lines += _render_histogram("mcp_tool_response_bytes", "Serialized size of MCP tool responses before budgeting.", "tool", self.response_bytes)
+            lines += _render_histogram("mcp_tool_response_tokens", "Token count of MCP tool responses before budgeting.", "tool", self.response_tokens)
+            lines += _render_counter("mcp_tool_responses_truncated_total", "MCP tool responses cut to fit the token budget.", {("tool", k): v for k, v in self.truncated.items()})
+            lines += _render_histogram("upstream_request_duration_seconds", "Latency of upstream HTTP calls.", "host", self.upstream_latency)
+            lines += _render_counter("upstream_errors_total", "Upstream HTTP calls that failed.", {("host", k): v for k, v in self.upstream_errors.items()})
+
+            lines.append("# HELP cache_requests_total Cache lookups by result.")
+            lines.append("# TYPE cache_requests_total counter")
+            for (cache, result), value in sorted(self.cache_lookups.items()):
+                lines.append(f'cache_requests_total{{cache="{cache}",result="{result}"}} {value}')
+
+            lines.append("# HELP cache_hit_ratio Fraction of cache lookups served from cache.")
+            lines.append("# TYPE cache_hit_ratio gauge")
+            for cache in sorted({cache for cache, _ in self.cache_lookups}):
+                hits = self.cache_lookups.get((cache, "hit"), 0)
+                misses = self.cache_lookups.get((cache, "miss"), 0)
+                lines.append(f'cache_hit_ratio{{cache="{cache}"}} {hits / (hits + misses) if hits + misses else 0}')
+        return "\n".join(lines) + "\n"
+
+
+def _render_histogram(name: str, help_text: str, label: str, histograms: Dict[str, _Histogram]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for key, hist in sorted(histograms.items()):
+        for bound, count in zip(hist.buckets, hist.counts):
+            lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {hist.total}')
+        lines.append(f'{name}_sum{{{label}="{key}"}} {hist.sum}')
+        lines.append(f'{name}_count{{{label}="{key}"}} {hist.total}')
+    return lines
+
+
+def _render_counter(name: str, help_text: str, values: Dict[tuple, int]) -> List[str]:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for (label, key), value in sorted(values.items()):
+        lines.append(f'{name}{{{label}="{key}"}} {value}')
+    return lines
+
+
+metrics = Metrics()
+
+
+def register_metrics_route(mcp):
+    """Expose the metric registry at GET /metrics on a FastMCP server."""
+    from starlette.requests import Request
+    from starlette.responses import PlainTextResponse
+
+    @mcp.custom_route("/metrics", methods=["GET"])
+    async def metrics_endpoint(request: Request) -> PlainTextResponse:
+        return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
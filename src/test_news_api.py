@@ -4,10 +4,7 @@ import requests
 import re
 import json
 import datetime
-import tiktoken 
 import random
-import newsapi
-from newsapi import NewsApiClient
 from typing import Dict, List, Any, Optional
 from dotenv import load_dotenv
 from mcp.server.fastmcp import FastMCP
@@ -0,0 +1,211 @@
+import os
+import sys
+import json
+import inspect
+import functools
+from typing import Any, Dict, List, Optional
+
+from telemetry import metrics, current_span
+
+
+# Environment variables
+TOOL_RESPONSE_TOKEN_BUDGET = int(os.getenv("TOOL_RESPONSE_TOKEN_BUDGET", "4000"))  # 0 disables budgeting
+TOKEN_ENCODING = os.getenv("TOKEN_ENCODING", "cl100k_base")
+
+# Shrinking targets this share of the budget, leaving room for the truncation note
+BUDGET_HEADROOM = 0.9
+MIN_STRING_CHARS = 80
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """Tokenizer for counting, imported lazily; None when tiktoken or its data isn't available."""
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(TOKEN_ENCODING)
+    except Exception as e:
+        print(f"[tiktoken unavailable, estimating token counts: {e}]", file=sys.stderr)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        # Roughly four characters per token for English text and JSON
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def serialize(result: Any) -> str:
+    """Serialize a tool result roughly the way FastMCP sends it to the client."""
+    if isinstance(result, str):
+        return result
+    return json.dumps(result, indent=2, default=str, ensure_ascii=False)
+
+
+def _list_note(items: List[Any], text: str, note: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+    """
+    A note to append to `items` in their element type, so typed results such as
+    List[Dict] still pass FastMCP's output validation; None for mixed lists.
+    """
+    if items and all(isinstance(item, dict) for item in items):
+        return note if note is not None else {"...": text}
+    if all(isinstance(item, str) for item in items):
+        return text
+    return None
+
+
+def _shrink(value: Any, max_items: int, max_chars: int, top_level: bool = False) -> Any:
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[:max_chars] + "..."
+    if isinstance(value, (list, tuple)):
+        items = [_shrink(item, max_items, max_chars) for item in value[:max_items]]
+        if len(value) > max_items:
+            note = _list_note(value, f"... {len(value) - max_items} more items omitted")
+            if note is not None:
+                items.append(note)
+        return items
+    if isinstance(value, dict):
+        # Top-level keys are kept so the response keeps its shape; nested
+        # mappings such as AlphaVantage time series keep their first entries
+        keys = list(value) if top_level else list(value)[:max_items]
+        shrunk = {key: _shrink(value[key], max_items, max_chars) for key in keys}
+        if len(value) > len(keys):
+            shrunk["..."] = f"{len(value) - len(keys)} more entries omitted"
+        return shrunk
+    return value
+
+
+def _largest(value: Any) -> tuple:
+    """Length of the longest collection and the longest string in `value`."""
+    if isinstance(value, str):
+        return 0, len(value)
+    if isinstance(value, dict):
+        children = list(value.values())
+    elif isinstance(value, (list, tuple)):
+        children = value
+    else:
+        return 0, 0
+    sizes = [_largest(child) for child in children]
+    return max([len(children)] + [size[0] for size in sizes]), max([0] + [size[1] for size in sizes])
+
+
+def fit_to_budget(result: Any, budget: int) -> Any:
+    """
+    Truncate long strings and collections in `result` until it fits in `budget` tokens.
+
+    The limits start at the largest collection and string in the result and
+    are scaled by how far the last attempt was over budget, so a response
+    slightly over the budget loses only its longest parts. The result keeps
+    its type.
+    """
+    original_tokens = tokens = count_tokens(serialize(result))
+    max_items, max_chars = _largest(result)
+    top_level = True
+    while True:
+        # Items and string length both shrink the response, so each takes the square root of the ratio
+        scale = min(BUDGET_HEADROOM, (budget * BUDGET_HEADROOM / tokens) ** 0.5)
+        max_items = max(1, int(max_items * scale))
+        max_chars = max(MIN_STRING_CHARS, int(max_chars * scale))
+        shrunk = _shrink(result, max_items, max_chars, top_level)
+        tokens = count_tokens(serialize(shrunk))
+        if tokens <= budget:
+            return shrunk
+        if max_items == 1 and max_chars == MIN_STRING_CHARS:
+            if not top_level:
+                break
+            # Start over, this time also capping the top-level keys (e.g. a dict with very many of them)
+            top_level = False
+            tokens = original_tokens
+            max_items, max_chars = _largest(result)
+
+    # Still too large (deeply nested data): keep a prefix of the serialized text, in the result's type
+    text = serialize(shrunk)[: budget * 3]
+    if isinstance(result, dict):
+        return {"truncated_content": text}
+    if isinstance(result, (list, tuple)):
+        note = _list_note(result, text, {"truncated_content": text})
+        return [note] if note is not None else []
+    return text
+
+
+def budgeted_response(func=None, *, truncate: bool = True):
+    """
+    Measure a tool's serialized response and fit it to TOOL_RESPONSE_TOKEN_BUDGET.
+
+    Apply it below `@traced_tool` so the sizes are attached to the tool span.
+    Use `@budgeted_response(truncate=False)` for tools whose output must
+    arrive intact, such as file downloads; their sizes are still recorded.
+    """
+    if func is None:
+        return functools.partial(budgeted_response, truncate=truncate)
+    tool_name = func.__name__
+
+    def budget(result: Any) -> Any:
+        text = serialize(result)
+        size_bytes = len(text.encode("utf-8"))
+        tokens = count_tokens(text)
+
+        returned_tokens = tokens
+        if truncate and TOOL_RESPONSE_TOKEN_BUDGET and tokens > TOOL_RESPONSE_TOKEN_BUDGET:
+            result = fit_to_budget(result, TOOL_RESPONSE_TOKEN_BUDGET)
+            returned_tokens = count_tokens(serialize(result))
+            note = {"truncated": True, "original_tokens": tokens, "returned_tokens": returned_tokens}
+            if isinstance(result, dict):
+                result["_budget"] = note
+            elif isinstance(result, list):
+                item = _list_note(result, f"[response truncated from {tokens} to about {returned_tokens} tokens]", {"_budget": note})
+                if item is not None:
+                    result.append(item)
+            else:
+                result = f"{result}\n[response truncated from {tokens} to about {returned_tokens} tokens]"
+
+        metrics.observe_response(tool_name, size_bytes, tokens, returned_tokens)
+        span = current_span()
+        if span is not None:
+            span.set_attribute("response_bytes", size_bytes)
+            span.set_attribute("response_tokens", tokens)
+            span.set_attribute("returned_tokens", returned_tokens)
+        return result
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return budget(await func(*args, **kwargs))
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return budget(func(*args, **kwargs))
+
+    return wrapper
+
+
+def usage_summary(result: Any) -> Dict[str, Any]:
+    """Per-turn token usage and tool payload sizes from a pydantic-ai run result."""
+    from pydantic_ai.messages import ModelRequest, ToolReturnPart
+
+    usage = result.usage()
+    payloads = []
+    for message in result.new_messages():
+        if isinstance(message, ModelRequest):
+            for part in message.parts:
+                if isinstance(part, ToolReturnPart):
+                    payloads.append({"tool": part.tool_name, "bytes": len(part.model_response_str().encode("utf-8"))})
+    return {
+        "input_tokens": getattr(usage, "input_tokens", None) or getattr(usage, "request_tokens", None) or 0,
+        "output_tokens": getattr(usage, "output_tokens", None) or getattr(usage, "response_tokens", None) or 0,
+        "requests": getattr(usage, "requests", 0),
+        "tool_payloads": payloads,
+    }
+
+
+def format_usage(summary: Dict[str, Any]) -> str:
+    """One-line usage text for the chat apps."""
+    text = (f"{summary['input_tokens']} input / {summary['output_tokens']} output tokens "
+            f"over {summary['requests']} model request(s)")
+    if summary["tool_payloads"]:
+        tools = ", ".join(f"{p['tool']} {p['bytes']:,} B" for p in summary["tool_payloads"])
+        text += f"; tool payloads: {tools}"
+    return text
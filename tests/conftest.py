@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Keep test runs from writing spans to traces/
+os.environ.setdefault("TRACING_ENABLED", "false")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
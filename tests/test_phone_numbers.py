@@ -0,0 +1,57 @@
+import pytest
+
+from phone_numbers import local_country_code, normalize_phone
+
+
+@pytest.mark.parametrize("phone", [
+    "9575787870",
+    "+91 95757 87870",
+    "0091 95757 87870",
+    "919575787870",
+    "09575787870",
+])
+def test_india_formats_normalize_to_e164(phone):
+    assert normalize_phone(phone, "IN") == {"valid": True, "normalized": "+919575787870", "local_plan": True}
+
+
+def test_india_nine_digits_rejected():
+    result = normalize_phone("957578787", "IN")
+    assert not result["valid"]
+    assert "Impossible length" in result["reason"]
+
+
+def test_india_impossible_prefix_rejected():
+    result = normalize_phone("1575787870", "IN")
+    assert not result["valid"]
+    assert "Impossible prefix" in result["reason"]
+
+
+def test_wrong_calling_code_rejected():
+    result = normalize_phone("+44 9575787870", "IN")
+    assert not result["valid"]
+    assert "Calling code" in result["reason"]
+
+
+@pytest.mark.parametrize("phone", ["07911 123456", "+44 7911 123456", "+44 (0)7911 123456"])
+def test_gb_trunk_prefix_dropped(phone):
+    assert normalize_phone(phone, "GB")["normalized"] == "+447911123456"
+
+
+@pytest.mark.parametrize("phone", ["06 1234 5678", "+39 06 1234 5678"])
+def test_it_leading_zero_kept(phone):
+    assert normalize_phone(phone, "IT")["normalized"] == "+390612345678"
+
+
+@pytest.mark.parametrize("phone", ["", "95757-ABC-870"])
+def test_malformed_input_rejected(phone):
+    assert not normalize_phone(phone, "IN")["valid"]
+
+
+def test_country_without_plan_uses_e164_bounds():
+    assert normalize_phone("+352 621 123 456", "LU") == {"valid": True, "normalized": "+352621123456", "local_plan": False}
+    assert not normalize_phone("12345", "LU")["valid"]
+
+
+@pytest.mark.parametrize("country, code", [("India", "IN"), (" uk ", "GB"), ("de", "DE"), ("Atlantis", None)])
+def test_local_country_code(country, code):
+    assert local_country_code(country) == code
@@ -0,0 +1,76 @@
+import asyncio
+import base64
+from typing import Any, Dict, List
+
+import pytest
+
+import token_accounting
+from telemetry import traced_tool
+from token_accounting import budgeted_response, count_tokens, fit_to_budget, serialize
+
+
+def articles(count: int) -> List[Dict[str, Any]]:
+    return [{"title": f"Headline {i}", "description": "word " * 120, "url": f"https://example.com/{i}"} for i in range(count)]
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    def set_budget(tokens: int):
+        monkeypatch.setattr(token_accounting, "TOOL_RESPONSE_TOKEN_BUDGET", tokens)
+    return set_budget
+
+
+def test_budgeted_list_of_dicts_passes_fastmcp_output_validation(budget):
+    fastmcp = pytest.importorskip("mcp.server.fastmcp")
+    budget(500)
+    mcp = fastmcp.FastMCP("budget-test")
+
+    @mcp.tool()
+    @traced_tool
+    @budgeted_response
+    def get_news() -> List[Dict[str, Any]]:
+        return articles(20)
+
+    _, structured = asyncio.run(mcp.call_tool("get_news", {}))
+    items = structured["result"]
+    assert all(isinstance(item, dict) for item in items)
+    assert items[-1]["_budget"]["truncated"] is True
+    assert items[-1]["_budget"]["returned_tokens"] <= 500
+
+
+def test_list_of_strings_keeps_string_notes():
+    shrunk = fit_to_budget(["line " * 100] * 50, 500)
+    assert all(isinstance(item, str) for item in shrunk)
+    assert shrunk[-1].endswith("more items omitted")
+
+
+def test_shrinks_in_proportion_to_overshoot():
+    payload = articles(60)
+    assert count_tokens(serialize(payload)) > 8000
+    returned = count_tokens(serialize(fit_to_budget(payload, 4000)))
+    assert 3000 < returned <= 4000
+
+
+def test_dict_result_keeps_type_and_budget_note(budget):
+    budget(300)
+
+    @budgeted_response
+    def many_keys() -> Dict[str, Any]:
+        return {f"key{i}": "value " * 10 for i in range(500)}
+
+    result = many_keys()
+    assert isinstance(result, dict)
+    assert result["_budget"]["original_tokens"] > 300
+
+
+def test_truncate_false_returns_output_intact(budget):
+    budget(100)
+    content = base64.b64encode(b"x" * 30000).decode("ascii")
+
+    @budgeted_response(truncate=False)
+    def fetch() -> Dict[str, Any]:
+        return {"encoding": "base64", "content": content}
+
+    result = fetch()
+    assert result["content"] == content
+    assert "_budget" not in result